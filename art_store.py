@@ -0,0 +1,77 @@
+"""Shared, compressed storage for room ASCII art.
+
+Rooms do not hold their art. They hold a key into an ArtStore, which
+keeps each distinct piece of art once, zlib-compressed. Rooms with the
+same art share one copy, however many levels and sessions use it.
+
+    key = ART.put(art)  # The same key for the same art
+    art = ART.get(key)  # Decoded only when a room is rendered
+
+Decoding goes through a small LRU cache, so the rooms a player keeps
+walking through are not decompressed over and over. The display width
+of each piece of art is measured once and kept (see `width`).
+
+`hashlib` and `zlib` are imported where they are used, so importing the
+game does not pay for them before its first level is built.
+"""
+import sys
+from functools import lru_cache
+from typing import Dict
+
+from text_width import art_width
+
+# Decoded art kept ready for rendering
+DECODED_CACHE_SIZE = 64
+
+
+class ArtStore:
+    """
+    Art deduplicated by content hash, compressed until it is needed.
+
+    Args:
+        cache_size: Number of decoded pieces of art to keep
+    """
+
+    def __init__(self, cache_size: int = DECODED_CACHE_SIZE):
+        self._blobs: Dict[str, bytes] = {}  # key -> compressed art
+        self._widths: Dict[str, int] = {}  # key -> columns of widest line
+        self.get = lru_cache(maxsize=cache_size)(self._decode)
+
+    def put(self, art: str) -> str:
+        """Store art, if it is new, and return its key."""
+        from hashlib import blake2b
+
+        encoded = art.encode("utf-8")
+        # Interned, so every room with this art shares one key string
+        key = sys.intern(blake2b(encoded, digest_size=16).hexdigest())
+        if key not in self._blobs:
+            import zlib
+
+            self._blobs[key] = zlib.compress(encoded, 9)
+        return key
+
+    def _decode(self, key: str) -> str:
+        import zlib
+
+        return zlib.decompress(self._blobs[key]).decode("utf-8")
+
+    def width(self, key: str) -> int:
+        """Columns taken by the widest line of the art."""
+        width = self._widths.get(key)
+        if width is None:
+            width = self._widths[key] = art_width(self.get(key))
+        return width
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._blobs
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    def compressed_size(self) -> int:
+        """Bytes of compressed art held, not counting overheads."""
+        return sum(len(blob) for blob in self._blobs.values())
+
+
+# The store every room uses
+ART = ArtStore()
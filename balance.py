@@ -0,0 +1,231 @@
+"""Sweep boss and item parameters to balance a level.
+
+For every configuration in a grid of required item counts, boss health,
+boss power and item power scales, this works out how likely a player is
+to win the boss battle with each set of items they could be holding.
+
+A battle only depends on the total power of the items held, so the 2^n
+item subsets are never enumerated one by one: they are counted by size
+and total power, and the exact win probability is solved once per
+distinct total (see combat.battle_odds). Configurations are independent
+and are spread over a process pool, so a sweep scales with the number
+of cores.
+
+    python balance.py --level 1 --required 4:6 --boss-health 150:250:50
+"""
+import os
+from functools import partial
+from typing import (
+    Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+)
+
+from combat import battle_odds
+
+
+class Configuration(NamedTuple):
+    required_items: int
+    boss_health: int
+    boss_power: int
+    item_scale: int  # Percent of the level's item powers
+
+
+class Outcome(NamedTuple):
+    configuration: Configuration
+    subsets: int  # Item subsets large enough to face the boss
+    worst: float  # Lowest win probability of those subsets
+    mean: float  # Mean win probability over those subsets
+    best: float  # Win probability holding every item
+
+
+def subset_counts(powers: Sequence[int]) -> Dict[Tuple[int, int], int]:
+    """Count the item subsets by (number of items, total power)."""
+    counts = {(0, 0): 1}
+    for power in powers:
+        grown = dict(counts)
+        for (size, total), count in counts.items():
+            key = (size + 1, total + power)
+            grown[key] = grown.get(key, 0) + count
+        counts = grown
+    return counts
+
+
+def evaluate(
+    configuration: Configuration, powers: Sequence[int],
+    player_health: int = 100
+) -> Outcome:
+    """Work out the win probabilities of one configuration."""
+    scaled = [power * configuration.item_scale // 100 for power in powers]
+    boss = {
+        "health": configuration.boss_health,
+        "power": configuration.boss_power,
+    }
+    win_rates: Dict[int, float] = {}  # Solved once per total power
+    subsets = 0
+    weighted = 0.0
+    worst = 1.0
+    for (size, total), count in sorted(subset_counts(scaled).items()):
+        if size < configuration.required_items:
+            continue  # The boss defeats anyone holding fewer at once
+        if total not in win_rates:
+            win_rates[total] = battle_odds(
+                total, player_health, boss
+            ).win_probability
+        win_rate = win_rates[total]
+        subsets += count
+        weighted += win_rate * count
+        worst = min(worst, win_rate)
+
+    if not subsets:
+        return Outcome(configuration, 0, 0.0, 0.0, 0.0)
+    best = win_rates[sum(scaled)]
+    return Outcome(configuration, subsets, worst, weighted / subsets, best)
+
+
+def _evaluate_chunk(
+    chunk: List[Configuration], powers: Sequence[int], player_health: int
+) -> List[Outcome]:
+    return [
+        evaluate(configuration, powers, player_health)
+        for configuration in chunk
+    ]
+
+
+def grid(
+    required_items: Sequence[int], boss_health: Sequence[int],
+    boss_power: Sequence[int], item_scale: Sequence[int]
+) -> Iterator[Configuration]:
+    for required in required_items:
+        for health in boss_health:
+            for power in boss_power:
+                for scale in item_scale:
+                    yield Configuration(required, health, power, scale)
+
+
+def sweep(
+    configurations: Sequence[Configuration], powers: Sequence[int],
+    player_health: int = 100, workers: Optional[int] = None
+) -> List[Outcome]:
+    """
+    Evaluate every configuration, in parallel unless workers is 0.
+
+    Args:
+        configurations: The grid to evaluate
+        powers: Power of each item in the level
+        player_health: Health the player starts the battle with
+        workers: Worker processes, one per CPU by default
+
+    Returns:
+        One Outcome per configuration, in grid order
+    """
+    configurations = list(configurations)
+    if workers == 0:
+        return _evaluate_chunk(configurations, powers, player_health)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    # A few chunks per worker keeps them all busy until the end
+    chunk_size = max(1, len(configurations) // (workers * 4))
+    chunks = [
+        configurations[start:start + chunk_size]
+        for start in range(0, len(configurations), chunk_size)
+    ]
+    evaluate_chunk = partial(
+        _evaluate_chunk, powers=powers, player_health=player_health
+    )
+    with ProcessPoolExecutor(workers) as pool:
+        results = pool.map(evaluate_chunk, chunks)
+        return [outcome for chunk in results for outcome in chunk]
+
+
+def format_table(outcomes: Sequence[Outcome]) -> str:
+    lines = [
+        "required  health  power  items%   subsets   worst    mean    best",
+    ]
+    for outcome in outcomes:
+        required, health, power, scale = outcome.configuration
+        lines.append(
+            f"{required:>8} {health:>7} {power:>6} {scale:>6}% "
+            f"{outcome.subsets:>9,} {outcome.worst:>7.1%} "
+            f"{outcome.mean:>7.1%} {outcome.best:>7.1%}"
+        )
+    return "\n".join(lines)
+
+
+def level_parameters(level_number: int) -> Tuple[List[int], Dict]:
+    """(item powers, level data) of a level, as the level defines them."""
+    from level_manager import compile_level
+
+    template = compile_level(level_number)
+    if template is None:
+        raise ValueError(f"level {level_number} does not exist")
+    powers = [
+        item.power
+        for room in template.rooms.values() for item in room.items
+    ]
+    return powers, template.level_data
+
+
+def parse_range(text: str) -> List[int]:
+    """Parse "N", "LOW:HIGH" or "LOW:HIGH:STEP" (inclusive)."""
+    parts = [int(part) for part in text.split(":")]
+    if len(parts) == 1:
+        return parts
+    low, high = parts[:2]
+    step = parts[2] if len(parts) > 2 else 1
+    return list(range(low, high + 1, step))
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Sweep boss and item parameters to balance a level."
+    )
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument(
+        "--required", help="required items, e.g. 4:6 (default: level's)"
+    )
+    parser.add_argument(
+        "--boss-health", help="e.g. 150:250:25 (default: level's)"
+    )
+    parser.add_argument(
+        "--boss-power", help="e.g. 50:90:10 (default: level's)"
+    )
+    parser.add_argument(
+        "--item-scale", default="100",
+        help="item power as a percent of the level's, e.g. 80:120:10"
+    )
+    parser.add_argument(
+        "--player-health", type=int, default=100,
+        help="health the player starts the battle with (default: 100)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="worker processes (default: one per CPU; 0: no pool)"
+    )
+    args = parser.parse_args()
+
+    try:
+        powers, level_data = level_parameters(args.level)
+    except ValueError as error:
+        parser.error(str(error))
+    boss = level_data["boss"]
+    configurations = list(grid(
+        parse_range(args.required or str(level_data["required_items"])),
+        parse_range(args.boss_health or str(boss["health"])),
+        parse_range(args.boss_power or str(boss["power"])),
+        parse_range(args.item_scale),
+    ))
+    outcomes = sweep(
+        configurations, powers, args.player_health, args.workers
+    )
+    print(
+        f"Level {args.level}: {len(powers)} items, "
+        f"{2 ** len(powers):,} subsets, {len(configurations)} configurations"
+    )
+    print(format_table(outcomes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""Performance benchmarks for the game's hot paths.
+
+Run a benchmark from the repository root, e.g.
+`python -m benchmarks.bench_commands`.
+"""
@@ -0,0 +1,117 @@
+"""Compare room art held as plain strings with the shared art store.
+
+A large level is given the art of levels 1 and 2, spread over its rooms.
+Every room read from a level file gets its own copy of its art, which is
+what rooms held before the art store; with the store each distinct piece
+of art is kept once, compressed. Reports the memory each approach takes
+and how long a room waits for its art when it is rendered.
+
+It then builds and renders rooms, and reports the memory they hold
+afterwards, next to what they would hold if each room's cached frame
+kept a copy of its art.
+
+Usage: python -m benchmarks.bench_art [--rooms N]
+"""
+import argparse
+import timeit
+import tracemalloc
+from typing import Callable, List
+
+from art_store import ArtStore
+from game_classes import Room
+from level_manager import compile_level
+from output import NullSink
+
+
+def level_art() -> List[str]:
+    """The distinct art of the hand-written levels."""
+    arts = {
+        room._base_ascii_art
+        for level in (1, 2)
+        for room in compile_level(level).rooms.values()
+    }
+    return sorted(arts)
+
+
+def traced_bytes(build: Callable[[], object]) -> int:
+    """Memory still held by what build returns."""
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del kept
+    return used
+
+
+def rendered_rooms(arts: List[str], count: int) -> List[Room]:
+    """Build rooms with the given art and display each of them once."""
+    output = NullSink()
+    rooms = []
+    for number in range(count):
+        room = Room(
+            f"Room {number}", "A room.", arts[number % len(arts)], "library"
+        )
+        room.display(output)
+        rooms.append(room)
+    return rooms
+
+
+def with_full_frames(arts: List[str], count: int) -> List[object]:
+    """Rendered rooms plus a full copy of each one's display text."""
+    rooms = rendered_rooms(arts, count)
+    return [rooms, [room.render() for room in rooms]]
+
+
+def microseconds(run: Callable[[], object], number: int = 100_000) -> float:
+    return min(timeit.repeat(run, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=100_000)
+    args = parser.parse_args()
+
+    arts = level_art()
+    rooms = range(args.rooms)
+
+    def plain() -> List[str]:
+        # A new string per room, as loading a level file produces
+        return [arts[room % len(arts)].encode().decode() for room in rooms]
+
+    store = ArtStore()
+
+    def stored() -> List[str]:
+        return [
+            store.put(arts[room % len(arts)].encode().decode())
+            for room in rooms
+        ]
+
+    plain_bytes = traced_bytes(plain)
+    store_bytes = traced_bytes(stored)
+    print(f"{args.rooms:,} rooms, {len(arts)} distinct pieces of art")
+    print(f"plain strings: {plain_bytes / 2**20:10.2f} MiB")
+    print(
+        f"art store:     {store_bytes / 2**20:10.2f} MiB "
+        f"({store.compressed_size():,} bytes of compressed art)"
+    )
+
+    text = arts[0]
+    key = store.put(text)
+    print(f"plain read:    {microseconds(lambda: text):10.3f} us")
+    print(f"cached decode: {microseconds(lambda: store.get(key)):10.3f} us")
+    uncached = store._decode
+    print(f"full decode:   {microseconds(lambda: uncached(key)):10.3f} us")
+
+    # The rooms' art goes into the shared store, so put it there first
+    rendered_rooms(arts, len(arts))
+    count = min(args.rooms, 20_000)
+    frames = traced_bytes(lambda: rendered_rooms(arts, count))
+    full = traced_bytes(lambda: with_full_frames(arts, count))
+    print(f"{count:,} rendered rooms:")
+    print(f"  art outside frames: {frames / count:10,.0f} bytes/room")
+    print(f"  art in frames:      {full / count:10,.0f} bytes/room")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Compare command dispatch throughput of the old if-chain and the registry.
+
+Usage: python -m benchmarks.bench_commands [--repeat N]
+"""
+import argparse
+import timeit
+
+from game_classes import Player
+from main import Game
+from output import NullSink, OutputSink
+from pacing import InstantPacer
+
+# Only verbs both paths understand, so they do the same work
+SCRIPT = [
+    "look", "go west", "take sword", "go east", "drop sword",
+    "inventory", "go north", "go south", "take sword", "dance", "",
+]
+
+
+def legacy_process_command(game: Game, command: str) -> None:
+    """The if-chain `Game.process_command` used before the registry."""
+    parts = command.split()
+
+    if not parts:
+        game.output.print("Please enter a command.")
+        return
+
+    action = parts[0]
+
+    if action == "quit":
+        game.game_over = True
+        game.output.print("Thanks for playing!")
+        return
+
+    if action == "look":
+        return
+
+    if action == "inventory":
+        game.player.display_inventory(game.output)
+        return
+
+    if action == "go" and len(parts) > 1:
+        game.move_player(parts[1])
+        return
+
+    if action == "take" and len(parts) > 1:
+        game.take_item(" ".join(parts[1:]))
+        return
+
+    if action == "drop" and len(parts) > 1:
+        game.drop_item(" ".join(parts[1:]))
+        return
+
+    game.output.print("I don't understand that command.")
+
+
+def new_game(dispatch_only: bool = False) -> Game:
+    game = Game(pacer=InstantPacer(), output=NullSink())
+    game.begin("Bench")
+    game.player.current_room_id = "hall"
+    if dispatch_only:
+        # Stub out the actions so only parsing and dispatch are timed
+        game.move_player = game.take_item = game.drop_item = _ignore
+        player = _QuietPlayer(game.player.name)
+        player.current_room_id = game.player.current_room_id
+        game.player = player
+    return game
+
+
+def _ignore(*args) -> None:
+    pass
+
+
+class _QuietPlayer(Player):
+    def display_inventory(self, output: OutputSink) -> None:
+        pass
+
+
+def commands_per_second(
+    process, repeat: int, dispatch_only: bool = False
+) -> float:
+    game = new_game(dispatch_only)
+
+    def run_script() -> None:
+        for command in SCRIPT:
+            process(game, command)
+
+    seconds = min(timeit.repeat(run_script, number=repeat, repeat=5))
+    return len(SCRIPT) * repeat / seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    for label, dispatch_only in (("full", False), ("dispatch", True)):
+        old = commands_per_second(
+            legacy_process_command, args.repeat, dispatch_only
+        )
+        new = commands_per_second(
+            Game.process_command, args.repeat, dispatch_only
+        )
+        print(f"{label:>8} if-chain: {old:12,.0f} commands/second")
+        print(
+            f"{label:>8} registry: {new:12,.0f} commands/second "
+            f"({new / old:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
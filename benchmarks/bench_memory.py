@@ -0,0 +1,73 @@
+"""Measure the memory cost of each live game session.
+
+Each session is measured after walking through a few rooms, displaying
+each one as the game loop does.
+
+Usage: python -m benchmarks.bench_memory [--sessions N] [--level N]
+           [--walk N]
+"""
+import argparse
+import importlib
+import tracemalloc
+
+from level_manager import load_level
+from main import Game
+from output import NullSink
+from pacing import InstantPacer
+from game_classes import Player
+
+
+def new_session(level: int, rebuild: bool, walk: int) -> Game:
+    game = Game(pacer=InstantPacer(), output=NullSink())
+    game.player = Player("Bench")
+    if rebuild:
+        # What every session cost before levels were shared
+        importlib.import_module(f"level{level:02d}").initialize_level(game)
+    else:
+        load_level(game, level)
+    game.player.current_room_id = game.starting_room_id
+    for _ in range(walk):
+        room = game.peek_room(game.player.current_room_id)
+        room.display(game.output)
+        exits = [
+            direction for direction, room_id in room.connections.items()
+            if room_id != "boss"
+        ]
+        if not exits:
+            break
+        game.move_player(exits[-1])
+    return game
+
+
+def bytes_per_session(
+    sessions: int, level: int, rebuild: bool, walk: int
+) -> float:
+    load_level(Game(), level)  # Compile the shared level up front
+    new_session(level, rebuild, walk)  # Render the shared rooms once
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    games = [new_session(level, rebuild, walk) for _ in range(sessions)]
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del games
+    return used / sessions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument(
+        "--walk", type=int, default=6,
+        help="rooms each session walks through (default: 6)"
+    )
+    args = parser.parse_args()
+
+    rebuilt = bytes_per_session(args.sessions, args.level, True, args.walk)
+    shared = bytes_per_session(args.sessions, args.level, False, args.walk)
+    print(f"rebuilt level: {rebuilt:10,.0f} bytes/session")
+    print(f"shared level:  {shared:10,.0f} bytes/session")
+
+
+if __name__ == "__main__":
+    main()
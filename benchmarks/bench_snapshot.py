@@ -0,0 +1,106 @@
+"""Measure snapshot size and save/restore latency per game session.
+
+Plays a scripted session, saving after every command, then restores the
+final snapshot. Saves are timed both with one SnapshotWriter kept for the
+whole session (incremental) and with a new writer per save (full).
+
+Usage: python -m benchmarks.bench_snapshot [--level N] [--rooms N]
+           [--repeat N]
+"""
+import argparse
+import random
+import time
+from typing import List
+
+from level_generator import register_generated_level
+from main import Game
+from output import NullSink
+from pacing import InstantPacer
+from snapshot import SnapshotWriter, restore_game, save_game
+
+
+def play_session(level: int, commands: int) -> List[str]:
+    """Commands of a random walk through the level, taking items."""
+    rng = random.Random(level)
+    game = new_game(level)
+    script = []
+    while len(script) < commands:
+        room = game.rooms[game.player.current_room_id]
+        items = list(room.items)
+        if items and len(game.player.inventory) < game.required_items - 1:
+            command = f"take {items[0].name}"
+        else:
+            exits = [
+                direction
+                for direction, room_id in room.connections.items()
+                if room_id != "boss"
+            ]
+            command = f"go {rng.choice(exits)}"
+        game.process_command(command)
+        script.append(command)
+    return script
+
+
+def new_game(level: int) -> Game:
+    game = Game(seed=level, pacer=InstantPacer(), output=NullSink())
+    game.current_level = level
+    game.begin("Bench")
+    return game
+
+
+def time_saves(level: int, script: List[str], incremental: bool) -> float:
+    """Mean seconds per save when saving after every command."""
+    game = new_game(level)
+    writer = SnapshotWriter(game)
+    elapsed = 0.0
+    for command in script:
+        game.process_command(command)
+        start = time.perf_counter()
+        if incremental:
+            writer.save()
+        else:
+            save_game(game)
+        elapsed += time.perf_counter() - start
+    return elapsed / len(script)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument(
+        "--rooms", type=int, default=0,
+        help="use a generated level of this many rooms instead"
+    )
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    level = args.level
+    if args.rooms:
+        level = 99
+        register_generated_level(level, args.rooms)
+    script = play_session(level, args.commands)
+
+    game = new_game(level)
+    for command in script:
+        game.process_command(command)
+    data = save_game(game)
+    copied = sum(1 for _ in game.rooms.copied())
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        restore_game(Game(pacer=InstantPacer(), output=NullSink()), data)
+    restore = (time.perf_counter() - start) / args.repeat
+
+    full = time_saves(level, script, False)
+    incremental = time_saves(level, script, True)
+    print(f"commands played:   {len(script):10,}")
+    print(f"rooms copied:      {copied:10,}")
+    print(f"snapshot size:     {len(data):10,} bytes")
+    print(f"full save:         {full * 1e6:10.1f} us")
+    print(f"incremental save:  {incremental * 1e6:10.1f} us")
+    print(f"restore:           {restore * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
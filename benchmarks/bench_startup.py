@@ -0,0 +1,62 @@
+"""Measure import time and time-to-first-prompt of the game.
+
+Usage: python -m benchmarks.bench_startup [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIRST_PROMPT = b"What would you like to do?"
+
+
+def import_time_us() -> int:
+    """Cumulative `python -X importtime` time of `import main`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, check=True
+    )
+    for line in result.stderr.decode().splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == "main":
+            return int(fields[1])
+    raise RuntimeError("main missing from -X importtime output")
+
+
+def time_to_first_prompt() -> float:
+    """Seconds from launching the game until it asks for a command."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=ROOT,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE
+    )
+    process.stdin.write(b"Bench\n")
+    process.stdin.flush()
+    output = b""
+    while FIRST_PROMPT not in output:
+        chunk = process.stdout.read1(4096)
+        if not chunk:
+            raise RuntimeError("game exited before its first prompt")
+        output += chunk
+    elapsed = time.perf_counter() - start
+    process.kill()
+    process.wait()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    imports = [import_time_us() for _ in range(args.runs)]
+    prompts = [time_to_first_prompt() for _ in range(args.runs)]
+    print(f"import main:     {statistics.median(imports) / 1000:8.1f} ms")
+    print(f"first prompt:    {statistics.median(prompts) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Measure level transition latency with and without prefetching.
+
+Two large generated levels are registered, and a game on the first one
+advances to the second, once after the second was prefetched in the
+background and once with it built on demand.
+
+Usage: python -m benchmarks.bench_transition [--rooms N]
+"""
+import argparse
+
+import level_manager
+from level_generator import register_generated_level
+from main import Game
+from output import NullSink
+from pacing import InstantPacer
+
+FIRST_LEVEL = 90
+
+
+def transition_time(prefetch: bool) -> float:
+    """Seconds taken by advance_to_next_level."""
+    level_manager._templates.pop(FIRST_LEVEL + 1, None)
+    game = Game(pacer=InstantPacer(), output=NullSink())
+    game.prefetch_next_level = prefetch
+    game.current_level = FIRST_LEVEL
+    game.begin("Bench")
+    thread = level_manager._prefetching.get(FIRST_LEVEL + 1)
+    if prefetch and thread:
+        thread.join()  # The player is still busy with this level
+    game.advance_to_next_level()
+    return game.transition_times[-1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=20_000)
+    args = parser.parse_args()
+
+    register_generated_level(FIRST_LEVEL, args.rooms, seed=1)
+    register_generated_level(FIRST_LEVEL + 1, args.rooms, seed=2)
+
+    on_demand = transition_time(False)
+    prefetched = transition_time(True)
+    print(f"built on demand: {on_demand * 1000:10.2f} ms")
+    print(f"prefetched:      {prefetched * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
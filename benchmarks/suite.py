@@ -0,0 +1,243 @@
+"""Time the game's hot paths and save the results as JSON.
+
+Each benchmark is timed with timeit, taking the best of several repeats.
+Save a run per commit and compare two runs to spot regressions:
+
+Usage: python -m benchmarks.suite [--output FILE] [--compare FILE]
+           [--only NAME ...] [--rooms N]
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from typing import Callable, Dict, List, Optional, Tuple
+
+import level_manager
+from game_classes import Item, Player
+from level_generator import register_generated_level
+from main import Game
+from output import NullSink
+from pacing import InstantPacer
+
+# Level number the generated level is registered under
+GENERATED_LEVEL = 90
+
+SESSION = [
+    "look", "go north", "go west", "take sword", "take shield", "go east",
+    "inventory", "go east", "take spellbook", "go north", "take potion",
+    "go south", "go west", "drop shield", "take shield", "dance", "",
+]
+
+# name -> (setup() -> run(), operations per run)
+Benchmark = Tuple[Callable[[], Callable[[], None]], int]
+
+
+def new_game(level: int = 1) -> Game:
+    game = Game(seed=0, pacer=InstantPacer(), output=NullSink())
+    game.prefetch_next_level = False
+    game.current_level = level
+    game.begin("Bench")
+    return game
+
+
+def bench_session() -> Callable[[], None]:
+    """A scripted session, one fresh game per run."""
+    def run() -> None:
+        game = new_game()
+        for command in SESSION:
+            game.process_command(command)
+    return run
+
+
+def bench_display_cached() -> Callable[[], None]:
+    game = new_game()
+    room = game.rooms["hall"]
+    output = game.output
+    return lambda: room.display(output)
+
+
+def bench_display_changed() -> Callable[[], None]:
+    """Display a room whose contents changed since it was last shown."""
+    game = new_game()
+    room = game.rooms["hall"]
+    output = game.output
+    item = Item.define("Pebble", "A small pebble.")
+
+    def run() -> None:
+        room.add_item(item)
+        room.display(output)
+        room.remove_item("pebble")
+    return run
+
+
+def _large_inventory(size: int) -> Player:
+    player = Player("Bench")
+    for number in range(size):
+        player.inventory.append(
+            Item.define(f"Trinket {number}", "A trinket.", number % 7)
+        )
+    return player
+
+
+def bench_inventory_remove() -> Callable[[], None]:
+    """Remove and re-add items spread over a 10,000-item inventory."""
+    player = _large_inventory(10_000)
+    names = [f"trinket {number}" for number in range(0, 10_000, 100)]
+
+    def run() -> None:
+        for name in names:
+            player.inventory.append(player.remove_from_inventory(name))
+    return run
+
+
+def bench_room_remove() -> Callable[[], None]:
+    """Take and drop items in a room holding 10,000 items."""
+    game = new_game()
+    room = game.rooms["hall"]
+    for number in range(10_000):
+        room.add_item(Item.define(f"Coin {number}", "A coin.", 1))
+    names = [f"coin {number}" for number in range(0, 10_000, 100)]
+
+    def run() -> None:
+        for name in names:
+            room.add_item(room.remove_item(name))
+    return run
+
+
+def bench_load_level(level: int, cold: bool) -> Callable[[], None]:
+    """Load a level into a new game, rebuilding its template if cold."""
+    game = Game(pacer=InstantPacer(), output=NullSink())
+    level_manager.load_level(game, level)
+
+    def run() -> None:
+        if cold:
+            level_manager._templates.pop(level, None)
+        level_manager.load_level(game, level)
+    return run
+
+
+def bench_boss_battle() -> Callable[[], None]:
+    """A whole boss battle with every item of level 1, headless."""
+    game = new_game()
+    for room in list(game.rooms.values()):
+        for item in room.items:
+            game.player.inventory.append(item)
+
+    # Stay on the level, so every run fights the same boss
+    game.advance_to_next_level = lambda: None
+
+    def run() -> None:
+        game.boss_battle()
+    return run
+
+
+def benchmarks(rooms: int) -> Dict[str, Benchmark]:
+    register_generated_level(GENERATED_LEVEL, rooms, seed=1)
+    return {
+        "session": (bench_session, len(SESSION)),
+        "display_cached": (bench_display_cached, 1),
+        "display_changed": (bench_display_changed, 1),
+        "inventory_remove": (bench_inventory_remove, 100),
+        "room_remove": (bench_room_remove, 100),
+        "load_level01": (lambda: bench_load_level(1, False), 1),
+        "load_level01_cold": (lambda: bench_load_level(1, True), 1),
+        "load_level02_cold": (lambda: bench_load_level(2, True), 1),
+        "load_generated": (
+            lambda: bench_load_level(GENERATED_LEVEL, False), 1
+        ),
+        "load_generated_cold": (
+            lambda: bench_load_level(GENERATED_LEVEL, True), 1
+        ),
+        "boss_battle": (bench_boss_battle, 1),
+    }
+
+
+def measure(
+    setup: Callable[[], Callable[[], None]], operations: int,
+    min_time: float = 0.2, repeat: int = 5
+) -> Dict[str, float]:
+    """Best-of-repeat seconds per operation of one benchmark."""
+    run = setup()
+    timer = timeit.Timer(run)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    return {
+        "seconds_per_op": best / operations,
+        "ops_per_second": operations / best,
+        "runs": number,
+        "repeat": repeat,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, check=True, text=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def compare(results: Dict, baseline: Dict) -> List[str]:
+    """Lines comparing each benchmark with the same one in a baseline."""
+    lines = [f"compared with {baseline.get('commit') or 'baseline'}:"]
+    for name, result in results["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            continue
+        ratio = before["seconds_per_op"] / result["seconds_per_op"]
+        lines.append(f"  {name:<22} {ratio:6.2f}x")
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="JSON file to save the results in")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    parser.add_argument("--only", nargs="+", metavar="NAME")
+    parser.add_argument(
+        "--rooms", type=int, default=20_000,
+        help="size of the generated level (default: 20000)"
+    )
+    args = parser.parse_args()
+
+    suite = benchmarks(args.rooms)
+    names = args.only or list(suite)
+    unknown = set(names) - set(suite)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "rooms": args.rooms,
+        "results": {},
+    }
+    for name in names:
+        setup, operations = suite[name]
+        result = results["results"][name] = measure(setup, operations)
+        print(
+            f"{name:<22} {result['seconds_per_op'] * 1e6:12.2f} us/op "
+            f"{result['ops_per_second']:14,.0f} ops/s"
+        )
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            print("\n".join(compare(results, json.load(baseline_file))))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+            output_file.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,479 @@
+"""Boss battle mechanics and a headless battle simulator.
+
+The damage rules here are shared by `Game.boss_battle` and the simulator,
+so balancing numbers produced by the simulator match what players see.
+
+`random` and `argparse` are imported where they are used, so importing
+this module for its damage rules keeps game startup fast.
+"""
+import struct
+import sys
+from array import array
+from collections import Counter
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Optional, Tuple
+)
+
+if TYPE_CHECKING:
+    import random
+
+# (round, player damage, boss damage, player health, boss health) after
+# a round; boss damage is 0 in a round where the boss was slain first
+BattleRound = Tuple[int, int, int, int, int]
+
+
+def effective_boss_power(boss_power: int, player_power: int) -> int:
+    """Boss power after being weakened by the player's items."""
+    return max(10, boss_power - player_power)
+
+
+def player_damage_range(player_power: int) -> Tuple[int, int]:
+    """Inclusive (low, high) damage range of a player attack."""
+    return player_power // 2, player_power
+
+
+def boss_damage_range(boss_power: int) -> Tuple[int, int]:
+    """Inclusive (low, high) damage range of a boss attack."""
+    return boss_power // 3, boss_power
+
+
+def new_rng(seed: Optional[int] = None) -> "random.Random":
+    """Create a random number stream, seeded for reproducible fights."""
+    import random
+
+    return random.Random(seed)
+
+
+def split_rng(rng: "random.Random") -> "random.Random":
+    """Derive an independent stream from another one, e.g. per worker."""
+    return new_rng(rng.getrandbits(128))
+
+
+def fight_rounds(
+    player_power: int, player_health: int, boss_health: int,
+    boss_power: int, rng: "random.Random"
+) -> Iterator[BattleRound]:
+    """
+    Fight a boss battle, yielding each round as it is fought.
+
+    Args:
+        player_power: Total power of the player's inventory
+        player_health: Starting health of the player
+        boss_health: Starting health of the boss
+        boss_power: Effective power of the boss
+        rng: Random number stream used for the damage rolls
+
+    Yields:
+        BattleRound tuples, until either side is defeated
+    """
+    player_range = player_damage_range(player_power)
+    boss_range = boss_damage_range(boss_power)
+    round_num = 1
+    while boss_health > 0 and player_health > 0:
+        player_damage = rng.randint(*player_range)
+        boss_health -= player_damage
+        boss_damage = 0
+        if boss_health > 0:
+            boss_damage = rng.randint(*boss_range)
+            player_health -= boss_damage
+        yield (
+            round_num, player_damage, boss_damage,
+            player_health, boss_health
+        )
+        round_num += 1
+
+
+class BattleOdds(NamedTuple):
+    win_probability: float
+    expected_rounds: float
+
+
+def battle_odds(
+    player_power: int, player_health: int, boss: Dict
+) -> BattleOdds:
+    """
+    Exact chance of winning a boss battle, and its expected length.
+
+    Args:
+        player_power: Total power of the player's inventory
+        player_health: Starting health of the player
+        boss: Boss dict with "health" and "power" keys (as in level data)
+
+    Returns:
+        BattleOdds of the battle boss_battle would fight
+    """
+    return _exact_odds(
+        player_power, player_health, boss["health"],
+        effective_boss_power(boss["power"], player_power)
+    )
+
+
+@lru_cache(maxsize=1024)
+def _exact_odds(
+    player_power: int, player_health: int, boss_health: int,
+    boss_power: int
+) -> BattleOdds:
+    """
+    Solve the battle's Markov chain over (player health, boss health).
+
+    Every round the boss loses a uniform roll of the player's damage and,
+    if still standing, the player loses a uniform roll of the boss's, so
+    player health strictly falls and states can be filled in by rising
+    player health. Each state's outcome is a mean over a rectangle of
+    earlier states, read from running 2D prefix sums, so the whole table
+    takes time proportional to player_health * boss_health.
+    """
+    player_low, player_high = player_damage_range(player_power)
+    boss_low, boss_high = boss_damage_range(boss_power)
+    if boss_health <= 0:
+        return BattleOdds(1.0, 0.0)
+    if player_health <= 0:
+        return BattleOdds(0.0, 0.0)
+    player_rolls = player_high - player_low + 1
+    weight = 1 / (player_rolls * (boss_high - boss_low + 1))
+
+    columns = boss_health + 1
+    # Prefix sums over rows 1..p and columns 1..b of win probability and
+    # expected rounds; row and column 0 stay zero
+    win_sums = [[0.0] * columns]
+    round_sums = [[0.0] * columns]
+    for health in range(1, player_health + 1):
+        # Rows of the states the player can be knocked down to
+        top = health - boss_low
+        bottom = health - min(boss_high, health - 1)
+        win_row = [0.0] * columns
+        round_row = [0.0] * columns
+        win_running = round_running = 0.0
+        for boss_left in range(1, columns):
+            # Rolls that slay the boss end the battle in this round
+            slaying = player_high - max(player_low, boss_left) + 1
+            win = max(0, min(slaying, player_rolls)) / player_rolls
+            rounds = 1.0
+            right = boss_left - player_low
+            left = boss_left - min(player_high, boss_left - 1)
+            if top >= 1 and right >= 1 and left <= right:
+                win += weight * _rectangle(
+                    win_sums, bottom, top, left, right
+                )
+                rounds += weight * _rectangle(
+                    round_sums, bottom, top, left, right
+                )
+            win_running += win
+            round_running += rounds
+            win_row[boss_left] = win_sums[-1][boss_left] + win_running
+            round_row[boss_left] = round_sums[-1][boss_left] + round_running
+        win_sums.append(win_row)
+        round_sums.append(round_row)
+
+    win = _rectangle(
+        win_sums, player_health, player_health, boss_health, boss_health
+    )
+    rounds = _rectangle(
+        round_sums, player_health, player_health, boss_health, boss_health
+    )
+    return BattleOdds(win, rounds)
+
+
+def _rectangle(
+    sums: List[List[float]], bottom: int, top: int, left: int, right: int
+) -> float:
+    """Sum of the values in rows bottom..top and columns left..right."""
+    return (
+        sums[top][right] - sums[bottom - 1][right]
+        - sums[top][left - 1] + sums[bottom - 1][left - 1]
+    )
+
+
+class CombatLog:
+    """
+    Compact binary record of a boss battle that can be replayed exactly.
+
+    The encoding is a fixed header with the starting stats followed by
+    three unsigned 16-bit values (round, player damage, boss damage) per
+    round, all little-endian.
+    """
+
+    # player power, player health, boss health, boss power
+    _HEADER = struct.Struct("<4I")
+
+    def __init__(
+        self, player_power: int, player_health: int,
+        boss_health: int, boss_power: int
+    ):
+        self.player_power = player_power
+        self.player_health = player_health
+        self.boss_health = boss_health
+        self.boss_power = boss_power
+        self.rounds = array("H")  # Flat (round, player, boss) triples
+
+    def record(self, battle_round: BattleRound) -> None:
+        self.rounds.extend(battle_round[:3])
+
+    def final_health(self) -> Tuple[int, int]:
+        """(player health, boss health) after the last recorded round."""
+        return (
+            self.player_health - sum(self.rounds[2::3]),
+            self.boss_health - sum(self.rounds[1::3])
+        )
+
+    def replay(self) -> Iterator[BattleRound]:
+        """Yield the recorded rounds exactly as they were fought."""
+        player_health = self.player_health
+        boss_health = self.boss_health
+        rounds = self.rounds
+        for start in range(0, len(rounds), 3):
+            round_num, player_damage, boss_damage = rounds[start:start + 3]
+            boss_health -= player_damage
+            player_health -= boss_damage
+            yield (
+                round_num, player_damage, boss_damage,
+                player_health, boss_health
+            )
+
+    def to_bytes(self) -> bytes:
+        rounds = array("H", self.rounds)
+        if sys.byteorder == "big":
+            rounds.byteswap()
+        header = self._HEADER.pack(
+            self.player_power, self.player_health,
+            self.boss_health, self.boss_power
+        )
+        return header + rounds.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CombatLog":
+        log = cls(*cls._HEADER.unpack_from(data))
+        log.rounds.frombytes(data[cls._HEADER.size:])
+        if sys.byteorder == "big":
+            log.rounds.byteswap()
+        return log
+
+
+class SimulationResult:
+    """Aggregated outcome of a batch of simulated boss battles."""
+
+    def __init__(
+        self, fights: int, wins: int,
+        rounds: Counter, player_health: Counter, boss_health: Counter,
+        health_bin: int
+    ):
+        self.fights = fights
+        self.wins = wins
+        self.rounds = rounds  # rounds fought -> number of fights
+        self.player_health = player_health  # bin -> wins with that health
+        self.boss_health = boss_health  # bin -> losses with that boss health
+        self.health_bin = health_bin
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.fights if self.fights else 0.0
+
+    @property
+    def mean_rounds(self) -> float:
+        if not self.fights:
+            return 0.0
+        total = sum(rounds * count for rounds, count in self.rounds.items())
+        return total / self.fights
+
+    def merge(self, other: "SimulationResult") -> None:
+        """Fold another batch into this result."""
+        self.fights += other.fights
+        self.wins += other.wins
+        self.rounds.update(other.rounds)
+        self.player_health.update(other.player_health)
+        self.boss_health.update(other.boss_health)
+
+    def summary(self) -> str:
+        lines = [
+            f"Fights: {self.fights}",
+            f"Win rate: {self.win_rate:.2%}",
+            f"Mean rounds: {self.mean_rounds:.2f}",
+            "Rounds:",
+        ]
+        for rounds in sorted(self.rounds):
+            lines.append(f"  {rounds:>3}: {self.rounds[rounds]}")
+        lines.append("Player health remaining after a win:")
+        for low in sorted(self.player_health):
+            high = low + self.health_bin - 1
+            lines.append(
+                f"  {low:>4}-{high:<4}: {self.player_health[low]}"
+            )
+        lines.append("Boss health remaining after a loss:")
+        for low in sorted(self.boss_health):
+            high = low + self.health_bin - 1
+            lines.append(f"  {low:>4}-{high:<4}: {self.boss_health[low]}")
+        return "\n".join(lines)
+
+
+def simulate_battles(
+    player_power: int, boss: Dict, fights: int = 100_000,
+    player_health: int = 100, seed: Optional[int] = None,
+    batch_size: int = 65_536, health_bin: int = 10,
+    rng: Optional["random.Random"] = None
+) -> SimulationResult:
+    """
+    Simulate many boss battles without any console I/O.
+
+    Args:
+        player_power: Total power of the player's inventory
+        boss: Boss dict with "health" and "power" keys (as in level data)
+        fights: Number of fights to simulate
+        player_health: Starting health of the player
+        seed: Seed for a reproducible run
+        batch_size: Number of fights simulated per batch
+        health_bin: Width of the remaining-health histogram bins
+        rng: Random number stream to use instead of seeding a new one,
+            e.g. from split_rng for parallel simulations
+
+    Returns:
+        SimulationResult with win rate and distributions
+    """
+    if rng is None:
+        rng = new_rng(seed)
+    boss_power = effective_boss_power(boss["power"], player_power)
+    result = SimulationResult(
+        0, 0, Counter(), Counter(), Counter(), health_bin
+    )
+    remaining = fights
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        result.merge(_simulate_batch(
+            rng, size, player_power, player_health,
+            boss["health"], boss_power, health_bin
+        ))
+        remaining -= size
+    return result
+
+
+def _simulate_batch(
+    rng: "random.Random", size: int, player_power: int, player_health: int,
+    boss_health: int, boss_power: int, health_bin: int
+) -> SimulationResult:
+    """Advance a whole batch of fights round by round in lockstep."""
+    player_low, player_high = player_damage_range(player_power)
+    boss_low, boss_high = boss_damage_range(boss_power)
+    player_span = player_high - player_low + 1
+    boss_span = boss_high - boss_low + 1
+    draw = rng.random
+
+    rounds = Counter()
+    player_left = Counter()
+    boss_left = Counter()
+    wins = 0
+
+    # Parallel arrays of the fights still in progress
+    boss_hp = [boss_health] * size
+    player_hp = [player_health] * size
+    round_num = 1
+    while boss_hp:
+        boss_hp = [
+            hp - player_low - int(draw() * player_span) for hp in boss_hp
+        ]
+        next_boss_hp: List[int] = []
+        next_player_hp: List[int] = []
+        for bhp, php in zip(boss_hp, player_hp):
+            if bhp <= 0:
+                wins += 1
+                rounds[round_num] += 1
+                player_left[php // health_bin * health_bin] += 1
+                continue
+            php -= boss_low + int(draw() * boss_span)
+            if php <= 0:
+                rounds[round_num] += 1
+                boss_left[bhp // health_bin * health_bin] += 1
+                continue
+            next_boss_hp.append(bhp)
+            next_player_hp.append(php)
+        boss_hp = next_boss_hp
+        player_hp = next_player_hp
+        round_num += 1
+
+    return SimulationResult(
+        size, wins, rounds, player_left, boss_left, health_bin
+    )
+
+
+def level_item_powers(game) -> List[int]:
+    """Power values of every item placed in the game's current level."""
+    return [
+        item.power for room in game.rooms.values() for item in room.items
+    ]
+
+
+def simulate_level(
+    level_number: int, fights: int = 100_000,
+    seed: Optional[int] = None, player_power: Optional[int] = None
+) -> Optional[SimulationResult]:
+    """
+    Simulate the boss fight of a level.
+
+    Args:
+        level_number: The level number to load
+        fights: Number of fights to simulate
+        seed: Seed for a reproducible run
+        player_power: Power to fight with; defaults to holding every item
+
+    Returns:
+        SimulationResult, or None if the level does not exist
+    """
+    # Imported here to keep `main` free to import this module
+    from level_manager import load_level
+    from main import Game
+
+    game = Game()
+    if not load_level(game, level_number):
+        return None
+    if player_power is None:
+        player_power = sum(level_item_powers(game))
+    return simulate_battles(player_power, game.boss, fights, seed=seed)
+
+
+def print_replay(log: CombatLog) -> None:
+    print(
+        f"Player power {log.player_power}, health {log.player_health}; "
+        f"boss power {log.boss_power}, health {log.boss_health}"
+    )
+    player_health = log.player_health
+    for battle_round in log.replay():
+        round_num, player_damage, boss_damage = battle_round[:3]
+        player_health, boss_health = battle_round[3:]
+        print(
+            f"Round {round_num}: player hits {player_damage}, "
+            f"boss hits {boss_damage} "
+            f"(player {player_health}, boss {boss_health})"
+        )
+    print("Player won" if player_health > 0 else "Boss won")
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Simulate boss battles without playing them."
+    )
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--fights", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--power", type=int, default=None,
+        help="player power (default: every item in the level)"
+    )
+    parser.add_argument(
+        "--replay", metavar="LOG",
+        help="print the fight recorded in a combat log file instead"
+    )
+    args = parser.parse_args()
+
+    if args.replay:
+        with open(args.replay, "rb") as log_file:
+            print_replay(CombatLog.from_bytes(log_file.read()))
+        return
+
+    result = simulate_level(args.level, args.fights, args.seed, args.power)
+    if result:
+        print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Command parsing and verb dispatch."""
+from typing import Callable, Dict, Optional, Tuple
+
+# Short forms accepted wherever a direction is expected
+DIRECTION_ALIASES = {
+    "n": "north",
+    "s": "south",
+    "e": "east",
+    "w": "west",
+    "u": "up",
+    "d": "down",
+}
+
+
+class Command:
+    """A player command split into its verb and arguments."""
+
+    __slots__ = ("verb", "args", "argument")
+
+    def __init__(self, verb: str, args: Tuple[str, ...] = ()):
+        self.verb = verb
+        self.args = args
+        self.argument = " ".join(args)  # e.g. the item name in "take x"
+
+    def __repr__(self) -> str:
+        return f"Command({self.verb!r}, {self.args!r})"
+
+
+def parse_command(text: str) -> Optional[Command]:
+    """Tokenize a line of player input, or return None if it is blank."""
+    parts = text.split()
+    if not parts:
+        return None
+    return Command(parts[0], tuple(parts[1:]))
+
+
+# A handler receives the game and the parsed command
+Handler = Callable[..., None]
+
+
+class CommandRegistry:
+    """Maps verbs and their aliases to command handlers."""
+
+    # Number of distinct input lines remembered by `resolve`
+    MAX_COMPILED = 4096
+
+    def __init__(self):
+        # verb or alias -> (handler, whether the command needs an
+        # argument, the verb it was registered under)
+        self._entries: Dict[str, Tuple[Handler, bool, str]] = {}
+        # input line -> (handler or None, parsed command or None)
+        self._compiled: Dict[str, Tuple] = {}
+
+    def register(
+        self, verb: str, handler: Handler, *aliases: str,
+        needs_argument: bool = False
+    ) -> None:
+        entry = (handler, needs_argument, verb.lower())
+        for name in (verb, *aliases):
+            self._entries[name.lower()] = entry
+        self._compiled.clear()
+
+    def verb(
+        self, verb: str, *aliases: str, needs_argument: bool = False
+    ) -> Callable[[Handler], Handler]:
+        """Decorator form of `register`."""
+        def decorator(handler: Handler) -> Handler:
+            self.register(
+                verb, handler, *aliases, needs_argument=needs_argument
+            )
+            return handler
+        return decorator
+
+    def copy(self) -> "CommandRegistry":
+        registry = CommandRegistry()
+        registry._entries = dict(self._entries)
+        return registry
+
+    def canonical(self, verb: str) -> Optional[str]:
+        """The verb an alias stands for, e.g. "inventory" for "i"."""
+        entry = self._entries.get(verb)
+        return entry and entry[2]
+
+    def lookup(self, command: Command) -> Optional[Handler]:
+        """Return the handler that accepts a command, if any."""
+        entry = self._entries.get(command.verb)
+        if entry is None or (entry[1] and not command.args):
+            return None
+        return entry[0]
+
+    def resolve(
+        self, text: str
+    ) -> Tuple[Optional[Handler], Optional[Command]]:
+        """
+        Parse a line of input and find its handler.
+
+        Players repeat the same few commands, so the result is cached per
+        input line and a repeated command costs a single dict lookup.
+
+        Args:
+            text: A line of player input
+
+        Returns:
+            Tuple of the handler (None if no handler accepts the command)
+            and the parsed command (None if the line is blank)
+        """
+        try:
+            return self._compiled[text]
+        except KeyError:
+            pass
+        command = parse_command(text)
+        resolved = (command and self.lookup(command), command)
+        if len(self._compiled) >= self.MAX_COMPILED:
+            self._compiled.clear()
+        self._compiled[text] = resolved
+        return resolved
+
+    def __contains__(self, verb: str) -> bool:
+        return verb in self._entries
@@ -1,4 +1,10 @@
-from typing import Optional, Tuple
+import sys
+from itertools import islice
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from art_store import ART
+from output import OutputSink
+from text_width import display_width, precompute_widths
 
 
 class Item:
@@ -31,11 +37,25 @@ class Item:
         "boss_chamber": "🐉 ⚡️ 🔥 ⚡️"
     }
 
+    __slots__ = ("name", "description", "power")
+
+    # Shared item definitions, see Item.define
+    _definitions: Dict[Tuple[str, str, int], "Item"] = {}
+
     def __init__(self, name: str, description: str, power: int = 0):
-        self.name = name
-        self.description = description
+        self.name = sys.intern(name)
+        self.description = sys.intern(description)
         self.power = power  # Power value for combat
 
+    @classmethod
+    def define(cls, name: str, description: str, power: int = 0) -> "Item":
+        """Return the one shared Item with these attributes."""
+        key = (name, description, power)
+        item = cls._definitions.get(key)
+        if item is None:
+            item = cls._definitions[key] = cls(name, description, power)
+        return item
+
     def __str__(self) -> str:
         return self.name
 
@@ -47,20 +67,131 @@ class Item:
         return self.ITEM_EMOJIS.get(item_name, default)
 
 
+# Every emoji a room can show, plus the separator between theme and item
+# emojis, so centering them never has to scan
+precompute_widths(
+    [*Item.ITEM_EMOJIS.values(), *Item.ROOM_THEME_EMOJIS.values(), "|"]
+)
+
+
+class ItemStore:
+    """
+    Items in the order they were added, indexed by case-folded name.
+
+    Checking for or removing an item by name takes constant time, and the
+    total power of the stored items is kept up to date as they change.
+    """
+
+    __slots__ = ("_items", "_by_name", "_next_key", "total_power")
+
+    def __init__(self, items: Iterable[Item] = ()):
+        self._items = {}  # key -> item, in the order items were added
+        self._by_name = {}  # folded name -> {key: None}, oldest first
+        self._next_key = 0
+        self.total_power = 0
+        for item in items:
+            self.append(item)
+
+    def append(self, item: Item) -> None:
+        key = self._next_key
+        self._next_key += 1
+        self._items[key] = item
+        self._by_name.setdefault(item.name.casefold(), {})[key] = None
+        self.total_power += item.power
+
+    def remove(self, item_name: str) -> Optional[Item]:
+        """Remove and return the oldest item with this name, ignoring case."""
+        folded = item_name.casefold()
+        keys = self._by_name.get(folded)
+        if not keys:
+            return None
+        key = next(iter(keys))
+        del keys[key]
+        if not keys:
+            del self._by_name[folded]
+        item = self._items.pop(key)
+        self.total_power -= item.power
+        return item
+
+    def copy(self) -> "ItemStore":
+        store = ItemStore.__new__(ItemStore)
+        store._items = dict(self._items)
+        store._by_name = {
+            name: dict(keys) for name, keys in self._by_name.items()
+        }
+        store._next_key = self._next_key
+        store.total_power = self.total_power
+        return store
+
+    def __contains__(self, item_name: str) -> bool:
+        return item_name.casefold() in self._by_name
+
+    def __iter__(self) -> Iterator[Item]:
+        return iter(self._items.values())
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+DEFAULT_ASCII_ART = """
+    ╔═══════════════╗
+    ║               ║
+    ║  Empty Room   ║
+    ║               ║
+    ╚═══════════════╝
+        """
+_default_art_key = None  # Stored on first use, see _default_art
+
+
+def _default_art() -> str:
+    """Key of DEFAULT_ASCII_ART in the art store."""
+    global _default_art_key
+    if _default_art_key is None:
+        _default_art_key = ART.put(DEFAULT_ASCII_ART)
+    return _default_art_key
+
+
 class Room:
+    __slots__ = (
+        "name", "description", "theme", "_art", "items",
+        "connections", "_item_positions", "_shared", "_version", "_frame"
+    )
+
     def __init__(
         self, name: str, description: str,
         ascii_art: Optional[str] = None,
         theme: Optional[str] = None
     ):
-        self.name = name
-        self.description = description
-        self._base_ascii_art = ascii_art or self._get_default_ascii_art()
-        self.items = []
+        self.name = sys.intern(name)
+        self.description = sys.intern(description)
+        # Key of the art in the shared art store
+        self._art = ART.put(ascii_art) if ascii_art else _default_art()
+        self.items = ItemStore()
         self.connections = {}  # direction -> room_id
-        self._item_positions = {}  # Item coordinates for ASCII art
-        theme_name = self._derive_theme_from_name()
-        self.theme = theme or theme_name
+        self._item_positions = None  # Item coordinates for ASCII art
+        self._shared = False  # Storage shared with copies of this room
+        self._version = 0  # Bumped whenever items or exits change
+        # (version, text before the art, text after it) of the last
+        # rendered frame; the art itself stays in the art store
+        self._frame = None
+        self.theme = theme or self._derive_theme_from_name()
+
+    def copy(self) -> "Room":
+        """Return a copy that shares storage until either room changes."""
+        clone = Room.__new__(Room)
+        for slot in Room.__slots__:
+            setattr(clone, slot, getattr(self, slot))
+        self._shared = clone._shared = True
+        return clone
+
+    def _unshare(self) -> None:
+        """Take private copies of shared storage before changing it."""
+        if self._shared:
+            self.items = self.items.copy()
+            self.connections = dict(self.connections)
+            if self._item_positions:
+                self._item_positions = dict(self._item_positions)
+            self._shared = False
 
     def _derive_theme_from_name(self) -> str:
         """Derive a theme key from the room name for emoji selection."""
@@ -71,42 +202,44 @@ class Room:
         # Default to the room name with spaces replaced by underscores
         return name_lower.replace(' ', '_')
 
-    def _get_default_ascii_art(self) -> str:
-        return """
-    ╔═══════════════╗
-    ║               ║
-    ║  Empty Room   ║
-    ║               ║
-    ╚═══════════════╝
-        """
+    @property
+    def _base_ascii_art(self) -> str:
+        """The room's art, decoded from the art store."""
+        return ART.get(self._art)
 
     def add_item(
         self, item: Item,
         position: Optional[Tuple[int, int]] = None
     ) -> None:
         """Add item to room with optional position for ASCII art display."""
+        self._unshare()
+        self._version += 1
         self.items.append(item)
         if position:
-            self._item_positions[item.name.lower()] = position
+            if self._item_positions is None:
+                self._item_positions = {}
+            self._item_positions[item.name.casefold()] = position
 
     def remove_item(self, item_name: str) -> Optional[Item]:
-        for i, item in enumerate(self.items):
-            if item.name.lower() == item_name.lower():
-                if item.name.lower() in self._item_positions:
-                    del self._item_positions[item.name.lower()]
-                return self.items.pop(i)
-        return None
+        if item_name not in self.items:
+            return None
+        self._unshare()
+        self._version += 1
+        if self._item_positions:
+            self._item_positions.pop(item_name.casefold(), None)
+        return self.items.remove(item_name)
 
     def add_connection(self, direction: str, room_id: str) -> None:
+        self._unshare()
+        self._version += 1
         self.connections[direction.lower()] = room_id
 
     def get_connection(self, direction: str) -> Optional[str]:
         return self.connections.get(direction.lower())
 
     def _get_max_line_length(self) -> int:
-        """Get the length of the longest line in the ASCII art."""
-        lines = self._base_ascii_art.split('\n')
-        return max(len(line) for line in lines if line.strip())
+        """Get the display width of the longest line in the ASCII art."""
+        return ART.width(self._art)
 
     def _get_theme_emojis(self) -> str:
         """Get themed emojis for this room plus any item emojis."""
@@ -129,102 +262,231 @@ class Room:
             return ""
 
         max_line_length = self._get_max_line_length()
-        emoji_length = len(emoji_line)
+        emoji_length = display_width(emoji_line)
 
         # Calculate padding to center the emoji line
         padding = max(0, (max_line_length - emoji_length) // 2)
 
         return " " * padding + emoji_line
 
-    def display(self) -> None:
-        print(f"\n=== {self.name} ===")
-        print(self.description)
-        print("\n" + self._base_ascii_art)
+    def _get_frame(self) -> Tuple[int, str, str]:
+        """The cached frame, rebuilt only after a change."""
+        frame = self._frame
+        if frame is None or frame[0] != self._version:
+            frame = self._frame = (self._version, *self._build_frame())
+        return frame
+
+    def render(self) -> str:
+        """Return the room's display text."""
+        _, head, tail = self._get_frame()
+        return head + self._base_ascii_art + tail[:-1]
+
+    def _build_frame(self) -> Tuple[str, str]:
+        """The display lines before and after the room's art."""
+        head = f"\n=== {self.name} ===\n{self.description}\n\n"
+        lines = []
 
         # Display themed emojis and item emojis below the ASCII art
         theme_emojis = self._get_theme_emojis()
         if theme_emojis:
-            centered_emojis = self._center_emojis(theme_emojis)
-            print(centered_emojis)
+            lines.append(self._center_emojis(theme_emojis))
 
         if self.items:
-            print("\nYou see:")
+            lines.append("\nYou see:")
             for item in self.items:
-                print(f"- {item.emoji} {item.name}: {item.description}")
+                lines.append(
+                    f"- {item.emoji} {item.name}: {item.description}"
+                )
 
-        print("\nPossible exits:")
+        lines.append("\nPossible exits:")
         for direction in self.connections:
-            print(f"- {direction.capitalize()}")
+            lines.append(f"- {direction.capitalize()}")
+        return head, "\n" + "\n".join(lines) + "\n"
+
+    def display(self, output: OutputSink) -> None:
+        # Written in pieces, so the decoded art is never copied into a
+        # string that outlives this call
+        _, head, tail = self._get_frame()
+        output.write(head)
+        output.write(self._base_ascii_art)
+        output.write(tail)
 
 
 class Player:
+    __slots__ = ("name", "health", "inventory", "current_room_id")
+
     def __init__(self, name: str, health: int = 100):
         self.name = name
         self.health = health
-        self.inventory = []
+        self.inventory = ItemStore()
         self.current_room_id = "start"  # Default starting room
 
-    def add_to_inventory(self, item: Item) -> None:
+    def add_to_inventory(self, item: Item, output: OutputSink) -> None:
         self.inventory.append(item)
-        print(f"Added {item.emoji} {item.name} to your inventory.")
+        output.print(f"Added {item.emoji} {item.name} to your inventory.")
 
     def remove_from_inventory(self, item_name: str) -> Optional[Item]:
-        for i, item in enumerate(self.inventory):
-            if item.name.lower() == item_name.lower():
-                return self.inventory.pop(i)
-        return None
+        return self.inventory.remove(item_name)
 
     def get_total_power(self) -> int:
-        return sum(item.power for item in self.inventory)
+        return self.inventory.total_power
 
-    def display_inventory(self) -> None:
+    def display_inventory(self, output: OutputSink) -> None:
         if not self.inventory:
-            print("Your inventory is empty.")
+            output.print("Your inventory is empty.")
             return
 
-        print("\n=== Inventory ===")
+        output.print("\n=== Inventory ===")
         for item in self.inventory:
-            print(
+            output.print(
                 f"- {item.emoji} {item.name}: {item.description} "
                 f"(Power: {item.power})"
             )
-        print(f"Total Power: {self.get_total_power()}")
-        print(f"Health: {self.health}")
-
-
-def preview_level(game) -> None:
-    """Display a preview of all rooms in the level with their items."""
-    print("\n=== LEVEL PREVIEW ===")
-    print(f"Level {game.current_level}")
-    print("-" * 50)
+        output.print(f"Total Power: {self.get_total_power()}")
+        output.print(f"Health: {self.health}")
+
+
+# Rooms a preview writes out at a time
+PREVIEW_FLUSH_ROOMS = 100
+
+
+def preview_rooms(
+    game, with_items: bool = False, within: Optional[int] = None
+) -> Iterator[Tuple[str, "Room"]]:
+    """
+    Yield the (room_id, room) pairs a level preview covers, one at a time.
+
+    Rooms are only read, never copied into the game, and rooms outside
+    the filters are skipped without being rendered.
+
+    Args:
+        game: The Game whose level to preview
+        with_items: Only rooms that hold at least one item
+        within: Only rooms at most this many moves from the starting
+            room, in order of distance
+    """
+    rooms = game.rooms
+    peek = getattr(rooms, "peek", rooms.__getitem__)
+    if within is None:
+        room_ids = iter(rooms)
+    else:
+        room_ids = _rooms_within(rooms, peek, game.starting_room_id, within)
+    for room_id in room_ids:
+        room = peek(room_id)
+        if with_items and not room.items:
+            continue
+        yield room_id, room
+
+
+def _rooms_within(rooms, peek, start_id: str, moves: int) -> Iterator[str]:
+    """Breadth-first search from a room that stops after some moves."""
+    if start_id not in rooms:
+        return
+    seen = {start_id}
+    frontier = [start_id]
+    for _ in range(moves + 1):
+        next_frontier = []
+        for room_id in frontier:
+            yield room_id
+            for target_id in peek(room_id).connections.values():
+                if target_id not in seen and target_id in rooms:
+                    seen.add(target_id)
+                    next_frontier.append(target_id)
+        frontier = next_frontier
+
+
+def _preview_room(room_id: str, room: "Room", peek) -> Iterator[str]:
+    """The preview lines of one room."""
+    yield f"\n=== {room.name} [{room_id}] ==="
+    yield room.description
+    yield "\n" + room._base_ascii_art
+
+    # Display themed emojis and item emojis below the ASCII art
+    theme_emojis = room._get_theme_emojis()
+    if theme_emojis:
+        yield room._center_emojis(theme_emojis)
+
+    if room.items:
+        yield "\nItems in this room:"
+        for item in room.items:
+            yield f"- {item.emoji} {item.name} (Power: {item.power})"
+            yield f"  Description: {item.description}"
+
+    yield "\nConnections:"
+    for direction, connected_room_id in room.connections.items():
+        try:
+            connected_room = peek(connected_room_id)
+        except KeyError:
+            continue
+        yield f"- {direction.capitalize()} ➡️ {connected_room.name}"
+
+    yield "-" * 50
+
+
+def preview_level(
+    game, page: int = 1, page_size: Optional[int] = None,
+    with_items: bool = False, within: Optional[int] = None,
+    summary: bool = False
+) -> None:
+    """
+    Display a preview of the rooms in the level with their items.
+
+    Rooms are rendered and written out one at a time, so even a level of
+    hundreds of thousands of rooms streams steadily instead of stalling.
+
+    Args:
+        game: The Game whose level to preview
+        page: Which page of rooms to show, counting from 1
+        page_size: Rooms per page, or None for all of them
+        with_items: Only rooms that hold at least one item
+        within: Only rooms at most this many moves from the start
+        summary: Report room and item counts instead of the rooms
+    """
+    output = game.output
+    rooms = game.rooms
+    peek = getattr(rooms, "peek", rooms.__getitem__)
+    selected = preview_rooms(game, with_items, within)
+
+    output.print("\n=== LEVEL PREVIEW ===")
+    output.print(f"Level {game.current_level}")
+    output.print("-" * 50)
 
     # Find the boss room to display its name
-    boss_room = game.rooms.get("boss")
-    if boss_room:
-        print(f"Final Boss: {boss_room.name}")
-        print("-" * 50)
-
-    for room_id, room in game.rooms.items():
-        print(f"\n=== {room.name} [{room_id}] ===")
-        print(room.description)
-        print("\n" + room._base_ascii_art)
-
-        # Display themed emojis and item emojis below the ASCII art
-        theme_emojis = room._get_theme_emojis()
-        if theme_emojis:
-            centered_emojis = room._center_emojis(theme_emojis)
-            print(centered_emojis)
-
-        if room.items:
-            print("\nItems in this room:")
-            for item in room.items:
-                print(f"- {item.emoji} {item.name} (Power: {item.power})")
-                print(f"  Description: {item.description}")
-
-        print("\nConnections:")
-        for direction, connected_room_id in room.connections.items():
-            connected_room = game.rooms.get(connected_room_id)
-            if connected_room:
-                print(f"- {direction.capitalize()} ➡️ {connected_room.name}")
-
-        print("-" * 50)
+    if "boss" in rooms:
+        output.print(f"Final Boss: {peek('boss').name}")
+        output.print("-" * 50)
+
+    if summary:
+        room_count = rooms_with_items = item_count = total_power = 0
+        for _, room in selected:
+            room_count += 1
+            if room.items:
+                rooms_with_items += 1
+                item_count += len(room.items)
+                total_power += room.items.total_power
+        output.print(f"Rooms: {room_count}")
+        output.print(f"Rooms with items: {rooms_with_items}")
+        output.print(f"Items: {item_count}")
+        output.print(f"Total item power: {total_power}")
+        output.flush()
+        return
+
+    if page_size is not None:
+        first = (page - 1) * page_size
+        # One room past the page tells whether there is another page
+        selected = islice(selected, first, first + page_size + 1)
+
+    shown = 0
+    for room_id, room in selected:
+        if page_size is not None and shown == page_size:
+            output.print(f"More rooms on page {page + 1}.")
+            break
+        for line in _preview_room(room_id, room, peek):
+            output.print(line)
+        shown += 1
+        if shown % PREVIEW_FLUSH_ROOMS == 0:
+            output.flush()
+    else:
+        if page_size is not None and not shown:
+            output.print(f"There are no rooms on page {page}.")
+    output.flush()
@@ -0,0 +1,265 @@
+"""Opt-in latency, call count and allocation metrics for the game.
+
+    metrics = enable_instrumentation()
+    ...  # play or host games
+    print(metrics.report())
+    metrics.write_prometheus("dnd.prom")
+    disable_instrumentation()
+
+Enabling instrumentation wraps the game's hot methods (see INSTRUMENTED)
+with timing code, for every game in the process. Disabling it puts the
+original methods back, so a game that is not being measured runs exactly
+the code it would without this module.
+
+Allocations are counted as the growth in the interpreter's allocated
+memory blocks (sys.getallocatedblocks) during a call.
+"""
+import os
+import sys
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+from game_classes import Room
+from main import Game
+
+# (class, method) pairs that are measured while instrumentation is on
+INSTRUMENTED = (
+    (Game, "process_command"),
+    (Game, "move_player"),
+    (Game, "take_item"),
+    (Game, "drop_item"),
+    (Game, "boss_battle"),
+    (Room, "display"),
+)
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0,
+    2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    """Latencies of one operation, counted in fixed buckets."""
+
+    __slots__ = ("counts", "total", "calls", "allocations")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # The last is +Inf
+        self.total = 0.0
+        self.calls = 0
+        self.allocations = 0
+
+    def record(self, seconds: float, allocations: int) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.calls += 1
+        if allocations > 0:
+            self.allocations += allocations
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile."""
+        rank = q * self.calls
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """Histograms per instrumented operation and per command verb."""
+
+    def __init__(self):
+        self.operations: Dict[str, Histogram] = {}
+        self.commands: Dict[str, Histogram] = {}  # verb -> histogram
+
+    def histogram(self, operation: str) -> Histogram:
+        histogram = self.operations.get(operation)
+        if histogram is None:
+            histogram = self.operations[operation] = Histogram()
+        return histogram
+
+    def command_histogram(self, verb: str) -> Histogram:
+        histogram = self.commands.get(verb)
+        if histogram is None:
+            histogram = self.commands[verb] = Histogram()
+        return histogram
+
+    def _rows(self) -> List[Tuple[str, str, Histogram]]:
+        rows = [
+            ("operation", name, histogram)
+            for name, histogram in sorted(self.operations.items())
+        ]
+        rows.extend(
+            ("command", verb, histogram)
+            for verb, histogram in sorted(self.commands.items())
+        )
+        return rows
+
+    def report(self) -> str:
+        """A table of calls, latency and allocations per operation."""
+        lines = [
+            f"{'':<9} {'name':<16} {'calls':>9} {'mean':>10} "
+            f"{'p50 <=':>10} {'p99 <=':>10} {'blocks':>8}"
+        ]
+        for kind, name, histogram in self._rows():
+            if not histogram.calls:
+                continue
+            mean = histogram.total / histogram.calls
+            lines.append(
+                f"{kind:<9} {name:<16} {histogram.calls:>9,} "
+                f"{_format_seconds(mean):>10} "
+                f"{_format_seconds(histogram.quantile(0.5)):>10} "
+                f"{_format_seconds(histogram.quantile(0.99)):>10} "
+                f"{histogram.allocations / histogram.calls:>8.1f}"
+            )
+        return "\n".join(lines)
+
+    def prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines = []
+        _histogram_family(
+            lines, "dnd_call", "instrumented game calls", "operation",
+            self.operations
+        )
+        # Splits process_command by verb, so kept apart from dnd_call to
+        # keep sums over either family from counting a command twice
+        _histogram_family(
+            lines, "dnd_command", "player commands, by verb", "verb",
+            self.commands
+        )
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Replace a metrics file, e.g. for a node exporter textfile."""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(self.prometheus())
+        os.replace(temp_path, path)
+
+
+def _histogram_family(
+    lines: List[str], prefix: str, description: str, label: str,
+    histograms: Dict[str, Histogram]
+) -> None:
+    """Append latency and allocation metrics for one kind of histogram."""
+    seconds = f"{prefix}_seconds"
+    blocks = f"{prefix}_allocated_blocks_total"
+    lines.append(f"# HELP {seconds} Latency of {description}.")
+    lines.append(f"# TYPE {seconds} histogram")
+    allocation_lines = [
+        f"# HELP {blocks} Memory blocks allocated by {description}.",
+        f"# TYPE {blocks} counter",
+    ]
+    for name, histogram in sorted(histograms.items()):
+        labels = f'{label}="{name}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS, histogram.counts):
+            cumulative += count
+            lines.append(
+                f'{seconds}_bucket{{{labels},le="{bound}"}} {cumulative}'
+            )
+        lines.append(
+            f'{seconds}_bucket{{{labels},le="+Inf"}} {histogram.calls}'
+        )
+        lines.append(f"{seconds}_sum{{{labels}}} {histogram.total}")
+        lines.append(f"{seconds}_count{{{labels}}} {histogram.calls}")
+        allocation_lines.append(
+            f"{blocks}{{{labels}}} {histogram.allocations}"
+        )
+    lines.extend(allocation_lines)
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds == float("inf"):
+        return "inf"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+
+# (class, method name) -> the method as it was before instrumenting
+_originals: Dict[Tuple[type, str], Callable] = {}
+_metrics: Optional[Metrics] = None
+
+
+def enable_instrumentation(metrics: Optional[Metrics] = None) -> Metrics:
+    """
+    Start measuring every game in this process.
+
+    Args:
+        metrics: Where to record measurements; a new Metrics by default
+
+    Returns:
+        The Metrics being recorded into
+    """
+    global _metrics
+    disable_instrumentation()
+    _metrics = metrics or Metrics()
+    for cls, name in INSTRUMENTED:
+        original = cls.__dict__[name]
+        _originals[cls, name] = original
+        if cls is Game and name == "process_command":
+            wrapper = _measure_command(original, _metrics)
+        else:
+            wrapper = _measure(original, _metrics.histogram(name))
+        setattr(cls, name, wrapper)
+    return _metrics
+
+
+def disable_instrumentation() -> Optional[Metrics]:
+    """Stop measuring, returning what was recorded, if anything."""
+    global _metrics
+    for (cls, name), original in _originals.items():
+        setattr(cls, name, original)
+    _originals.clear()
+    metrics, _metrics = _metrics, None
+    return metrics
+
+
+def _measure(method: Callable, histogram: Histogram) -> Callable:
+    clock = time.perf_counter
+    blocks = sys.getallocatedblocks
+
+    @wraps(method)
+    def measured(*args, **kwargs):
+        start_blocks = blocks()
+        start = clock()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            histogram.record(clock() - start, blocks() - start_blocks)
+
+    return measured
+
+
+def _measure_command(method: Callable, metrics: Metrics) -> Callable:
+    """Like _measure, but also records each command under its verb."""
+    clock = time.perf_counter
+    blocks = sys.getallocatedblocks
+    overall = metrics.histogram(method.__name__)
+
+    @wraps(method)
+    def measured(game: Game, command: str) -> None:
+        commands = game.commands
+        handler, parsed = commands.resolve(command)
+        # Aliases are recorded under their verb, e.g. "i" as "inventory"
+        verb = commands.canonical(parsed.verb) if handler else "(unknown)"
+        start_blocks = blocks()
+        start = clock()
+        try:
+            method(game, command)
+        finally:
+            seconds = clock() - start
+            allocations = blocks() - start_blocks
+            overall.record(seconds, allocations)
+            metrics.command_histogram(verb).record(seconds, allocations)
+
+    return measured
@@ -0,0 +1,242 @@
+"""Declarative level files and their compiled binary cache.
+
+A level file (levelNN.json) describes a level as plain data:
+
+    {
+        "name": "The Ancient Castle",
+        "description": "...",
+        "required_items": 6,
+        "starting_room": "start",
+        "boss": {"name": "...", "description": "...",
+                 "health": 200, "power": 70},
+        "rooms": {
+            "start": {
+                "name": "Castle Entrance",
+                "description": "...",
+                "ascii_art": "...",
+                "theme": "castle_entrance",
+                "exits": {"north": "hall"},
+                "items": [{"name": "Sword", "description": "...",
+                           "power": 15, "position": [2, 8]}]
+            }
+        }
+    }
+
+"ascii_art", "theme", "exits", "items" and item "position" are optional.
+
+The first load of a level file stores the parsed data in
+__levelcache__/levelNN.bin, in `marshal` format. Later loads read that
+cache with one memory-mapped read and no JSON parsing. The cache header
+records the source file's mtime, size and SHA-256 hash, so an edited
+level file is always parsed again.
+"""
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import struct
+from typing import Any, Dict, Optional, Tuple
+
+from game_classes import Item, Room
+
+CACHE_DIR_NAME = "__levelcache__"
+
+# magic, marshal format version, source mtime_ns, source size, source sha256
+_HEADER = struct.Struct("<4sIqq32s")
+_MAGIC = b"DNDL"
+
+
+def read_level_file(path: str) -> Dict[str, Any]:
+    """
+    Read a level file, using its compiled cache when it is up to date.
+
+    Args:
+        path: Path to the levelNN.json file
+
+    Returns:
+        The level description as plain data
+    """
+    cache_path = _cache_path(path)
+    stat = os.stat(path)
+    data = _read_cache(cache_path, path, stat)
+    if data is not None:
+        return data
+
+    with open(path, "rb") as level_file:
+        source = level_file.read()
+    data = json.loads(source)
+    _write_cache(cache_path, data, stat, hashlib.sha256(source).digest())
+    return data
+
+
+def _cache_path(path: str) -> str:
+    directory, file_name = os.path.split(os.path.abspath(path))
+    base_name = os.path.splitext(file_name)[0]
+    return os.path.join(directory, CACHE_DIR_NAME, base_name + ".bin")
+
+
+def _read_cache(
+    cache_path: str, source_path: str, stat: os.stat_result
+) -> Optional[Dict[str, Any]]:
+    try:
+        cache_file = open(cache_path, "rb")
+    except OSError:
+        return None
+
+    with cache_file:
+        if os.fstat(cache_file.fileno()).st_size < _HEADER.size:
+            return None
+        with mmap.mmap(
+            cache_file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapped:
+            data, digest = _load_mapped(mapped, source_path, stat)
+
+    if digest is not None:
+        # The source was touched but not changed: record its new mtime
+        # and size, so later loads need not hash it again
+        _write_cache(cache_path, data, stat, digest)
+    return data
+
+
+def _load_mapped(
+    mapped: mmap.mmap, source_path: str, stat: os.stat_result
+) -> Tuple[Optional[Dict[str, Any]], Optional[bytes]]:
+    """(cached data or None, digest if the header needs rewriting)"""
+    magic, version, mtime_ns, size, digest = _HEADER.unpack_from(mapped)
+    if magic != _MAGIC or version != marshal.version:
+        return None, None
+    touched = (mtime_ns, size) != (stat.st_mtime_ns, stat.st_size)
+    if touched:
+        # Touched or copied, but maybe not changed
+        with open(source_path, "rb") as level_file:
+            if hashlib.sha256(level_file.read()).digest() != digest:
+                return None, None
+    with memoryview(mapped) as view:
+        try:
+            data = marshal.loads(view[_HEADER.size:])
+        except (EOFError, ValueError, TypeError):
+            return None, None
+    return data, digest if touched else None
+
+
+def _write_cache(
+    cache_path: str, data: Dict[str, Any], stat: os.stat_result,
+    digest: bytes
+) -> None:
+    header = _HEADER.pack(
+        _MAGIC, marshal.version, stat.st_mtime_ns, stat.st_size, digest
+    )
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(temp_path, "wb") as cache_file:
+            cache_file.write(header + marshal.dumps(data))
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass  # The cache is only an optimization
+
+
+def build_room(room_data: Dict[str, Any]) -> Room:
+    """Create one room, with its exits and items, from its room data."""
+    room = Room(
+        room_data["name"],
+        room_data["description"],
+        room_data.get("ascii_art"),
+        room_data.get("theme")
+    )
+    for direction, target_id in room_data.get("exits", {}).items():
+        room.add_connection(direction, target_id)
+    for item_data in room_data.get("items", ()):
+        item = Item.define(
+            item_data["name"],
+            item_data["description"],
+            item_data.get("power", 0)
+        )
+        position = item_data.get("position")
+        room.add_item(item, tuple(position) if position else None)
+    return room
+
+
+def build_level(
+    data: Dict[str, Any]
+) -> Tuple[Dict[str, Room], Dict[str, Any]]:
+    """
+    Create the rooms and level metadata described by level data.
+
+    Args:
+        data: A level description as read by read_level_file
+
+    Returns:
+        Tuple of (room_id -> Room, level metadata)
+    """
+    rooms = {
+        room_id: build_room(room_data)
+        for room_id, room_data in data["rooms"].items()
+    }
+    level_data = {key: value for key, value in data.items() if key != "rooms"}
+    return rooms, level_data
+
+
+def level_to_data(
+    rooms: Dict[str, Room], level_data: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Describe built rooms and level metadata as declarative level data."""
+    data = {
+        key: value for key, value in level_data.items() if key != "commands"
+    }
+    data["rooms"] = {}
+    for room_id, room in rooms.items():
+        room_data = {
+            "name": room.name,
+            "description": room.description,
+            "ascii_art": room._base_ascii_art,
+            "theme": room.theme,
+            "exits": dict(room.connections),
+            "items": [],
+        }
+        positions = room._item_positions or {}
+        for item in room.items:
+            item_data = {
+                "name": item.name,
+                "description": item.description,
+                "power": item.power,
+            }
+            position = positions.get(item.name.casefold())
+            if position:
+                item_data["position"] = list(position)
+            room_data["items"].append(item_data)
+        data["rooms"][room_id] = room_data
+    return data
+
+
+def main() -> None:
+    import argparse
+
+    from level_manager import compile_level
+
+    parser = argparse.ArgumentParser(
+        description="Export a level as a declarative level file."
+    )
+    parser.add_argument("level", type=int)
+    parser.add_argument(
+        "--output", help="file to write (default: standard output)"
+    )
+    args = parser.parse_args()
+
+    template = compile_level(args.level)
+    if not template:
+        parser.error(f"level {args.level} does not exist")
+    text = json.dumps(
+        level_to_data(template.rooms, template.level_data),
+        indent=4, ensure_ascii=False
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as level_file:
+            level_file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
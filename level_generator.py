@@ -0,0 +1,217 @@
+"""Seeded procedural generation of levels of any size.
+
+Rooms are generated one at a time, in breadth-first order, as room data
+in the declarative level format (see level_format.py). A room's exits are
+complete when it is generated, so rooms can be built or written out as
+they are produced. Generation takes time linear in the number of rooms,
+and the same size and seed always produce the same level.
+"""
+import random
+from collections import deque
+from functools import partial
+from typing import Any, Dict, Iterator, Tuple
+
+from game_classes import Item
+from level_format import build_room
+
+OPPOSITE_DIRECTIONS = {
+    "north": "south",
+    "south": "north",
+    "east": "west",
+    "west": "east",
+    "up": "down",
+    "down": "up",
+}
+
+ADJECTIVES = (
+    "dusty", "silent", "crumbling", "gloomy", "echoing", "forgotten",
+    "damp", "gilded", "shadowy", "ancient",
+)
+
+# Chance that an ordinary room holds an item
+ITEM_CHANCE = 0.25
+
+
+class LevelGenerator:
+    """
+    Generates the rooms of one level, then its metadata.
+
+    Iterate over `rooms()` first; `level_data()` describes the boss and
+    required items using what was placed while the rooms were generated.
+    """
+
+    def __init__(self, size: int, seed: int = 0):
+        if size < 2:
+            raise ValueError("a level needs at least a start and boss room")
+        self.size = size
+        self.seed = seed
+        self.item_count = 0
+        self.item_power = 0
+        self._themes = [
+            theme for theme in Item.ROOM_THEME_EMOJIS
+            if theme != "boss_chamber"
+        ]
+        self._item_kinds = [
+            kind for kind in Item.ITEM_EMOJIS if kind != "default"
+        ]
+
+    def room_id(self, index: int) -> str:
+        if index == 0:
+            return "start"
+        if index == self.size - 1:
+            return "boss"
+        return f"room{index}"
+
+    def rooms(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (room_id, room data) for every room in the level."""
+        rng = random.Random(self.seed)
+        directions = list(OPPOSITE_DIRECTIONS)
+        next_index = 1
+        # Rooms whose parent is known but which are not yet generated:
+        # (index, direction back to the parent, parent index)
+        pending = deque([(0, None, None)])
+
+        while pending:
+            index, back, parent = pending.popleft()
+            exits = {}
+            if back:
+                exits[back] = self.room_id(parent)
+
+            # The boss room is always a dead end
+            if index != self.size - 1:
+                free = [d for d in directions if d not in exits]
+                rng.shuffle(free)
+                remaining = self.size - next_index
+                children = min(rng.randint(0, 3), len(free), remaining)
+                if not pending and children == 0 and remaining:
+                    children = 1  # Keep the level growing
+                for direction in free[:children]:
+                    exits[direction] = self.room_id(next_index)
+                    pending.append(
+                        (next_index, OPPOSITE_DIRECTIONS[direction], index)
+                    )
+                    next_index += 1
+
+            yield self.room_id(index), self._room_data(rng, index, exits)
+
+    def _room_data(
+        self, rng: random.Random, index: int, exits: Dict[str, str]
+    ) -> Dict[str, Any]:
+        if index == self.size - 1:
+            return {
+                "name": "Boss Chamber",
+                "description": "The lair of this level's master.",
+                "theme": "boss_chamber",
+                "exits": exits,
+            }
+
+        theme = rng.choice(self._themes)
+        adjective = rng.choice(ADJECTIVES)
+        title = theme.replace("_", " ")
+        room_data = {
+            "name": f"{title.title()} {index}",
+            "description": f"A {adjective} {title}.",
+            "theme": theme,
+            "exits": exits,
+        }
+        if index and rng.random() < ITEM_CHANCE:
+            kind = rng.choice(self._item_kinds)
+            power = rng.randint(5, 20)
+            room_data["items"] = [{
+                "name": kind.title(),
+                "description": f"A {rng.choice(ADJECTIVES)} {kind}.",
+                "power": power,
+            }]
+            self.item_count += 1
+            self.item_power += power
+        return room_data
+
+    def level_data(self) -> Dict[str, Any]:
+        """Level metadata, available once every room has been generated."""
+        required_items = min(6, self.item_count)
+        mean_power = self.item_power // max(1, self.item_count)
+        return {
+            "name": f"Generated Dungeon {self.seed}",
+            "description": (
+                f"A labyrinth of {self.size} rooms, different for "
+                "every seed."
+            ),
+            "required_items": required_items,
+            "starting_room": "start",
+            "boss": {
+                "name": "Dungeon Overlord",
+                "description": "A hulking shape that fills the chamber.",
+                "health": 80 + 20 * required_items,
+                "power": 10 + mean_power * required_items,
+            },
+        }
+
+
+def initialize_level(game, size: int = 1000, seed: int = 0) -> Dict[str, Any]:
+    """
+    Build a generated level, like a level module's initialize_level.
+
+    Args:
+        game: The Game (or level builder) to add the rooms to
+        size: Number of rooms, including the start and boss rooms
+        seed: Seed that determines the layout, rooms and items
+
+    Returns:
+        Dict containing level metadata
+    """
+    generator = LevelGenerator(size, seed)
+    for room_id, room_data in generator.rooms():
+        game.add_room(room_id, build_room(room_data))
+    return generator.level_data()
+
+
+def register_generated_level(
+    level_number: int, size: int, seed: int = 0
+) -> None:
+    """Make a generated level loadable with level_manager.load_level."""
+    from level_manager import register_level
+
+    register_level(
+        level_number, partial(initialize_level, size=size, seed=seed)
+    )
+
+
+def write_level_file(path: str, size: int, seed: int = 0) -> None:
+    """Stream a generated level into a levelNN.json level file."""
+    import json
+
+    generator = LevelGenerator(size, seed)
+    with open(path, "w", encoding="utf-8") as level_file:
+        level_file.write('{"rooms": {')
+        separator = "\n"
+        for room_id, room_data in generator.rooms():
+            level_file.write(
+                f"{separator}{json.dumps(room_id)}: "
+                f"{json.dumps(room_data, ensure_ascii=False)}"
+            )
+            separator = ",\n"
+        level_file.write("\n}")
+        for key, value in generator.level_data().items():
+            value_text = json.dumps(value, ensure_ascii=False)
+            level_file.write(f",\n{json.dumps(key)}: {value_text}")
+        level_file.write("}\n")
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Generate a level file of any size."
+    )
+    parser.add_argument(
+        "output", help="level file to write, e.g. level10.json"
+    )
+    parser.add_argument("--rooms", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_level_file(args.output, args.rooms, args.seed)
+
+
+if __name__ == "__main__":
+    main()
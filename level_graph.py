@@ -0,0 +1,429 @@
+"""Graph analysis of a level's room connections.
+
+Rooms are numbered and their exits stored as integer adjacency lists, so
+reachability and shortest-path queries are plain breadth-first searches
+that run in time linear in the number of rooms and exits.
+"""
+from collections import deque
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from game_classes import Room
+
+BOSS_ROOM_ID = "boss"
+
+# Routing tables kept per graph before the oldest are dropped
+MAX_ROUTING_TABLES = 64
+
+
+class LevelGraph:
+    """A level's rooms and exits as integer adjacency lists."""
+
+    def __init__(self, rooms: Mapping[str, Room]):
+        self.room_ids = list(rooms)
+        self.index = {room_id: i for i, room_id in enumerate(self.room_ids)}
+        self.adjacency: List[List[int]] = []
+        # (room_id, direction, target_id) of exits leading nowhere
+        self.dangling: List[Tuple[str, str, str]] = []
+        self.names: Dict[str, int] = {}  # folded room name -> room index
+        # folded item name -> indexes of the rooms the level places it in
+        self.item_rooms: Dict[str, List[int]] = {}
+        self._reverse: Optional[List[List[int]]] = None
+        self._next_hops: Dict[Tuple, List[int]] = {}
+        self._item_hops: Dict[Tuple, List[int]] = {}
+        for index, room_id in enumerate(self.room_ids):
+            room = rooms[room_id]
+            targets = []
+            for direction, target_id in room.connections.items():
+                target = self.index.get(target_id)
+                if target is None:
+                    self.dangling.append((room_id, direction, target_id))
+                else:
+                    targets.append(target)
+            self.adjacency.append(targets)
+            self.names.setdefault(room.name.casefold(), index)
+            for item in room.items:
+                self.item_rooms.setdefault(
+                    item.name.casefold(), []
+                ).append(index)
+
+    def copy(self) -> "LevelGraph":
+        """Return a copy that can be updated without affecting this one."""
+        graph = LevelGraph.__new__(LevelGraph)
+        graph.room_ids = list(self.room_ids)
+        graph.index = dict(self.index)
+        graph.adjacency = list(self.adjacency)  # Rows are replaced, not edited
+        graph.dangling = list(self.dangling)
+        graph.names = dict(self.names)
+        graph.item_rooms = self.item_rooms  # Where the level placed items
+        graph._reverse = None
+        graph._next_hops = {}
+        graph._item_hops = {}
+        return graph
+
+    def update_rooms(
+        self, rooms: Mapping[str, Room], room_ids: Iterable[str]
+    ) -> None:
+        """
+        Bring the exits of some rooms up to date after they changed.
+
+        Only the given rooms are re-read, and cached routing tables are
+        dropped only if an exit actually changed.
+
+        Args:
+            rooms: room_id -> Room, including any new rooms
+            room_ids: IDs of the rooms that were added or whose exits
+                may have changed
+        """
+        room_ids = list(room_ids)
+        changed = False
+        for room_id in room_ids:
+            if room_id not in self.index:
+                self.index[room_id] = len(self.room_ids)
+                self.room_ids.append(room_id)
+                self.adjacency.append([])
+                self.names.setdefault(
+                    rooms[room_id].name.casefold(), self.index[room_id]
+                )
+                changed = True
+        for room_id in room_ids:
+            targets = [
+                self.index[target_id]
+                for target_id in rooms[room_id].connections.values()
+                if target_id in self.index
+            ]
+            index = self.index[room_id]
+            if targets != self.adjacency[index]:
+                self.adjacency[index] = targets
+                changed = True
+        if changed:
+            self._reverse = None
+            self._next_hops.clear()
+            self._item_hops.clear()
+
+    def next_hops(
+        self, target: str, avoid: Iterable[str] = ()
+    ) -> List[int]:
+        """
+        Routing table of the first move on a shortest path to a room.
+
+        Tables are built on first use with one breadth-first search over
+        the reversed exits, then cached.
+
+        Args:
+            target: Room ID to route to
+            avoid: Room IDs that may be the target but not passed through
+
+        Returns:
+            For each room index, the index of the room to move to next,
+            or -1 if the target cannot be reached from that room
+        """
+        key = (target, tuple(sorted(avoid)))
+        table = self._next_hops.get(key)
+        if table is None:
+            if len(self._next_hops) >= MAX_ROUTING_TABLES:
+                self._next_hops.clear()
+            table = self._next_hops[key] = self._build_next_hops(
+                [self.index[target]], key[1]
+            )
+        return table
+
+    def item_hops(
+        self, item_name: str, changed: Mapping[str, bool],
+        avoid: Iterable[str] = ()
+    ) -> List[int]:
+        """
+        Routing table of the first move towards the nearest room holding
+        an item.
+
+        Built on first use with one breadth-first search over the
+        reversed exits, starting from every room holding the item, then
+        cached per item until the rooms holding it or any exit change.
+
+        Args:
+            item_name: Name of the item, in any case
+            changed: room_id -> whether the room holds the item, for
+                rooms whose items may differ from where the level placed
+                them, e.g. the rooms a game has copied
+            avoid: Room IDs that are neither passed through nor walked to
+
+        Returns:
+            For each room index, the index of the room to move to next,
+            the room's own index if it holds the item, or -1 if no room
+            holding it can be reached from that room
+        """
+        folded = item_name.casefold()
+        placed = set(self.item_rooms.get(folded, ()))
+        added = []
+        taken = []
+        for room_id, holds in changed.items():
+            index = self.index[room_id]
+            if holds and index not in placed:
+                added.append(index)
+            elif not holds and index in placed:
+                taken.append(index)
+        key = (folded, tuple(sorted(added)), tuple(sorted(taken)),
+               tuple(sorted(avoid)))
+        table = self._item_hops.get(key)
+        if table is None:
+            if len(self._item_hops) >= MAX_ROUTING_TABLES:
+                self._item_hops.clear()
+            goals = placed.difference(taken).union(added).difference(
+                self.index[room_id] for room_id in avoid
+                if room_id in self.index
+            )
+            table = self._item_hops[key] = self._build_next_hops(
+                goals, key[3]
+            )
+        return table
+
+    def _build_next_hops(
+        self, goals: Iterable[int], avoid: Tuple[str, ...]
+    ) -> List[int]:
+        if self._reverse is None:
+            reverse = [[] for _ in self.adjacency]
+            for room, targets in enumerate(self.adjacency):
+                for next_room in targets:
+                    reverse[next_room].append(room)
+            self._reverse = reverse
+        reverse = self._reverse
+        blocked = {self.index[room_id] for room_id in avoid
+                   if room_id in self.index}
+
+        next_hop = [-1] * len(self.adjacency)
+        queue = deque()
+        for goal in goals:
+            next_hop[goal] = goal
+            queue.append(goal)
+        while queue:
+            room = queue.popleft()
+            for previous in reverse[room]:
+                if next_hop[previous] < 0:
+                    next_hop[previous] = room
+                    # A blocked room may route onwards, but no route may
+                    # pass through it
+                    if previous not in blocked:
+                        queue.append(previous)
+        return next_hop
+
+    def route(
+        self, source: str, target: str, avoid: Iterable[str] = ()
+    ) -> Optional[List[str]]:
+        """Room IDs after the source along a shortest path, via next_hops."""
+        return self._follow(self.next_hops(target, avoid), source)
+
+    def route_to_item(
+        self, source: str, item_name: str, changed: Mapping[str, bool],
+        avoid: Iterable[str] = ()
+    ) -> Optional[List[str]]:
+        """Room IDs after the source on the way to the nearest item."""
+        return self._follow(self.item_hops(item_name, changed, avoid), source)
+
+    def _follow(self, table: List[int], source: str) -> Optional[List[str]]:
+        room = self.index[source]
+        if table[room] < 0:
+            return None
+        path = []
+        while table[room] != room:
+            room = table[room]
+            path.append(self.room_ids[room])
+        return path
+
+    def distances(
+        self, source: str, avoid: Iterable[str] = ()
+    ) -> List[int]:
+        """
+        Count the moves from a room to every other room.
+
+        Args:
+            source: Room ID to start from
+            avoid: Room IDs that may be reached but not passed through
+
+        Returns:
+            Moves needed per room index, or -1 for unreachable rooms
+        """
+        adjacency = self.adjacency
+        blocked = {self.index[room_id] for room_id in avoid
+                   if room_id in self.index}
+        distance = [-1] * len(adjacency)
+        start = self.index[source]
+        distance[start] = 0
+        queue = deque([start])
+        while queue:
+            room = queue.popleft()
+            if room in blocked and room != start:
+                continue
+            next_distance = distance[room] + 1
+            for target in adjacency[room]:
+                if distance[target] < 0:
+                    distance[target] = next_distance
+                    queue.append(target)
+        return distance
+
+    def all_pairs_distances(self) -> List[List[int]]:
+        """
+        Distance table between every pair of rooms.
+
+        This takes time and memory quadratic in the number of rooms, so
+        it is meant for hand-written levels; use `distances` for large
+        ones.
+        """
+        return [self.distances(room_id) for room_id in self.room_ids]
+
+    def strongly_connected_components(
+        self, rooms: Iterable[int]
+    ) -> List[List[int]]:
+        """
+        Group rooms that can all reach each other (Tarjan's algorithm).
+
+        Only exits between the given rooms are followed. Components are
+        returned in reverse topological order: every exit leaving a
+        component leads to a component earlier in the list.
+        """
+        members = set(rooms)
+        adjacency = self.adjacency
+        order: Dict[int, int] = {}
+        low: Dict[int, int] = {}
+        on_stack = set()
+        stack: List[int] = []
+        components = []
+
+        for root in members:
+            if root in order:
+                continue
+            order[root] = low[root] = len(order)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(adjacency[root]))]
+            while work:
+                room, targets = work[-1]
+                for target in targets:
+                    if target not in members:
+                        continue
+                    if target not in order:
+                        order[target] = low[target] = len(order)
+                        stack.append(target)
+                        on_stack.add(target)
+                        work.append((target, iter(adjacency[target])))
+                        break
+                    if target in on_stack:
+                        low[room] = min(low[room], order[target])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[room])
+                    if low[room] == order[room]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == room:
+                                break
+                        components.append(component)
+        return components
+
+
+class LevelAnalysis:
+    """Whether a level can be completed, and why not if it cannot."""
+
+    def __init__(
+        self, graph: LevelGraph, reachable_rooms: int,
+        collectable_items: int, required_items: int,
+        boss_reachable: bool, problems: List[str]
+    ):
+        self.graph = graph
+        self.reachable_rooms = reachable_rooms
+        # Most items a player can hold when stepping into the boss room
+        self.collectable_items = collectable_items
+        self.required_items = required_items
+        self.boss_reachable = boss_reachable
+        self.problems = problems
+
+    @property
+    def solvable(self) -> bool:
+        return not self.problems
+
+
+def analyze_level(
+    rooms: Mapping[str, Room], level_data: Mapping[str, Any]
+) -> LevelAnalysis:
+    """
+    Check that a level's boss can be reached with enough items.
+
+    Entering the boss room starts the boss encounter, so the player must
+    collect the required items without passing through it, and then
+    still be able to walk to it. Exits may be one-way, so rooms are
+    grouped into strongly connected components and the most items
+    collectable on the way to the boss is found with a longest-path pass
+    over the resulting acyclic graph.
+
+    Args:
+        rooms: room_id -> Room for the level
+        level_data: The level metadata
+
+    Returns:
+        LevelAnalysis describing the result
+    """
+    graph = LevelGraph(rooms)
+    required_items = level_data.get("required_items", 0)
+    start_id = level_data.get("starting_room", "start")
+    problems = [
+        f"exit {direction} from {room_id} leads to unknown room {target_id}"
+        for room_id, direction, target_id in graph.dangling
+    ]
+    if start_id not in graph.index:
+        problems.append(f"starting room {start_id} does not exist")
+        return LevelAnalysis(graph, 0, 0, required_items, False, problems)
+    if BOSS_ROOM_ID not in graph.index:
+        problems.append("there is no boss room")
+        return LevelAnalysis(graph, 0, 0, required_items, False, problems)
+
+    boss = graph.index[BOSS_ROOM_ID]
+    distance = graph.distances(start_id, avoid=[BOSS_ROOM_ID])
+    reachable = [
+        room for room, moves in enumerate(distance)
+        if moves >= 0 and room != boss
+    ]
+
+    # Most items collectable on a walk from the start that ends in each
+    # component, processed from the start outwards.
+    components = graph.strongly_connected_components(reachable)
+    component_of = {}
+    for number, component in enumerate(components):
+        for room in component:
+            component_of[room] = number
+    best: List[Optional[int]] = [None] * len(components)
+    best[component_of[graph.index[start_id]]] = 0
+    most_items = None
+    for number in reversed(range(len(components))):
+        if best[number] is None:
+            continue
+        component = components[number]
+        best[number] += sum(
+            len(rooms[graph.room_ids[room]].items) for room in component
+        )
+        for room in component:
+            for target in graph.adjacency[room]:
+                if target == boss:
+                    if most_items is None or best[number] > most_items:
+                        most_items = best[number]
+                    continue
+                other = component_of.get(target)
+                if other is not None and other != number:
+                    if best[other] is None or best[number] > best[other]:
+                        best[other] = best[number]
+
+    boss_reachable = most_items is not None
+    collectable = most_items or 0
+    if not boss_reachable:
+        problems.append("the boss room cannot be reached from the start")
+    elif collectable < required_items:
+        problems.append(
+            f"only {collectable} of the {required_items} required items "
+            "can be collected before reaching the boss"
+        )
+    return LevelAnalysis(
+        graph, len(reachable), collectable, required_items,
+        boss_reachable, problems
+    )
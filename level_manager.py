@@ -1,31 +1,301 @@
 import importlib
-from typing import Dict, Any, Optional
+import os
+import re
+import threading
+from typing import (
+    Any, Callable, Dict, Iterator, List, MutableMapping, Optional, Tuple
+)
+
+from game_classes import Item, Room
+from level_graph import analyze_level
+
+# Directory searched for levelNN.json level files and levelNN.py modules
+LEVEL_DIR = os.path.dirname(os.path.abspath(__file__))
+_LEVEL_FILE = re.compile(r"level(\d{2,})\.(?:py|json)")
+
+
+def available_levels() -> List[int]:
+    """List the level numbers that can be loaded, without importing any."""
+    numbers = set(_registered)
+    for file_name in os.listdir(LEVEL_DIR):
+        match = _LEVEL_FILE.fullmatch(file_name)
+        if match:
+            numbers.add(int(match.group(1)))
+    return sorted(numbers)
+
+
+class LevelRooms(MutableMapping):
+    """
+    A game's rooms, copied from the level template as they are first used.
+
+    Rooms the player never reaches are never copied, so a game holds only
+    the rooms it has actually visited or looked up.
+    """
+
+    __slots__ = ("_template", "_rooms")
+
+    _REMOVED = object()  # Marks a template room deleted from this game
+
+    def __init__(self, template: Dict[str, Room]):
+        self._template = template
+        self._rooms = {}
+
+    def __getitem__(self, room_id: str) -> Room:
+        room = self._rooms.get(room_id)
+        if room is None:
+            room = self._rooms[room_id] = self._template[room_id].copy()
+        elif room is self._REMOVED:
+            raise KeyError(room_id)
+        return room
+
+    def __setitem__(self, room_id: str, room: Room) -> None:
+        self._rooms[room_id] = room
+
+    def __delitem__(self, room_id: str) -> None:
+        self[room_id]  # Raises KeyError for unknown rooms
+        self._rooms[room_id] = self._REMOVED
+
+    def __iter__(self) -> Iterator[str]:
+        for room_id in self._template:
+            if self._rooms.get(room_id) is not self._REMOVED:
+                yield room_id
+        for room_id, room in self._rooms.items():
+            if room_id not in self._template and room is not self._REMOVED:
+                yield room_id
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, room_id: object) -> bool:
+        room = self._rooms.get(room_id)
+        if room is None:
+            return room_id in self._template
+        return room is not self._REMOVED
+
+    def peek(self, room_id: str) -> Room:
+        """Return a room for reading only, without copying it."""
+        room = self._rooms.get(room_id)
+        if room is None:
+            return self._template[room_id]
+        if room is self._REMOVED:
+            raise KeyError(room_id)
+        return room
+
+    def copied(self) -> Iterator[str]:
+        """Yield the IDs of rooms that this game has its own copy of."""
+        for room_id, room in self._rooms.items():
+            if room is not self._REMOVED:
+                yield room_id
+
+    def removed(self) -> Iterator[str]:
+        """Yield the IDs of template rooms deleted from this game."""
+        for room_id, room in self._rooms.items():
+            if room is self._REMOVED and room_id in self._template:
+                yield room_id
+
+    def changed_exits(self) -> Iterator[str]:
+        """Yield the IDs of rooms whose exits differ from the level's."""
+        for room_id in self.copied():
+            room = self._rooms[room_id]
+            template_room = self._template.get(room_id)
+            if template_room is None:
+                yield room_id
+            elif room.connections is not template_room.connections:
+                if room.connections != template_room.connections:
+                    yield room_id
+
+
+class LevelTemplate:
+    """
+    A compiled level shared by every game that loads it.
+
+    The template's rooms are never handed out directly. Each game gets
+    copy-on-write copies, so rooms, art and items are stored once no
+    matter how many games are playing the level.
+    """
+
+    def __init__(self, rooms: Dict[str, Room], level_data: Dict[str, Any]):
+        self.rooms = rooms
+        self.level_data = level_data
+        self.analysis = analyze_level(rooms, level_data)
+        self._items = None
+
+    @property
+    def items(self) -> List[Item]:
+        """Every item placed in the level, numbered in room order."""
+        if self._items is None:
+            items = []
+            seen = set()
+            for room in self.rooms.values():
+                for item in room.items:
+                    if id(item) not in seen:
+                        seen.add(id(item))
+                        items.append(item)
+            self._items = items
+        return self._items
+
+    def instantiate(self) -> LevelRooms:
+        """Create the per-game rooms for this level."""
+        return LevelRooms(self.rooms)
+
+
+class _LevelBuilder:
+    """Stands in for a Game while a level module builds its rooms."""
+
+    def __init__(self):
+        self.rooms = {}
+
+    def add_room(self, room_id: str, room: Room) -> None:
+        self.rooms[room_id] = room
+
+
+_templates: Dict[int, LevelTemplate] = {}
+
+# Held while a level is built, so a level being prefetched in the
+# background is built only once
+_compile_lock = threading.Lock()
+
+# Levels whose problems have been reported, see compile_level
+_reported = set()
+
+# level number -> thread started by prefetch_level
+_prefetching: Dict[int, threading.Thread] = {}
+
+# Levels provided by code rather than a levelNN file, see register_level
+_registered: Dict[int, Callable[[Any], Dict[str, Any]]] = {}
+
+
+def register_level(
+    level_number: int, initialize_level: Callable[[Any], Dict[str, Any]]
+) -> None:
+    """
+    Make a level available without a levelNN file, e.g. a generated one.
+
+    Args:
+        level_number: The level number to register
+        initialize_level: Builds the level, like a level module's
+            initialize_level(game)
+    """
+    _registered[level_number] = initialize_level
+    _templates.pop(level_number, None)
+    _reported.discard(level_number)
+
+
+def compile_level(
+    level_number: int, report: bool = True
+) -> Optional[LevelTemplate]:
+    """
+    Build a level once and cache it for every later load.
+
+    A registered level takes precedence over a levelNN.json level file,
+    which takes precedence over a levelNN.py module. If the level is
+    being built by prefetch_level, this waits for it to finish.
+
+    Args:
+        level_number: The level number to compile
+        report: Print a warning, once, if the level cannot be completed
+
+    Returns:
+        The shared LevelTemplate, or None if the level does not exist
+    """
+    template = _templates.get(level_number)
+    if template is None:
+        with _compile_lock:
+            template = _templates.get(level_number)
+            if template is None:
+                built = _build_level(level_number)
+                if not built:
+                    return None
+                template = _templates[level_number] = LevelTemplate(*built)
+
+    if report and level_number not in _reported:
+        _reported.add(level_number)
+        for problem in template.analysis.problems:
+            print(
+                f"Warning: level {level_number} cannot be completed: "
+                f"{problem}"
+            )
+    return template
+
+
+def prefetch_level(level_number: int) -> Optional[threading.Thread]:
+    """
+    Start compiling a level in a background thread, if it needs it.
+
+    Call this while the player is busy with the current level, so that
+    loading the next one does not have to wait for it to be built.
+
+    Returns:
+        The thread building the level, or None if it is already built
+        or does not exist
+    """
+    if level_number in _templates:
+        return None
+    thread = _prefetching.get(level_number)
+    if thread and thread.is_alive():
+        return thread
+    if level_number not in available_levels():
+        return None
+    thread = _prefetching[level_number] = threading.Thread(
+        target=compile_level, args=(level_number, False),
+        name=f"prefetch-level-{level_number}", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def _build_level(
+    level_number: int
+) -> Optional[Tuple[Dict[str, Room], Dict[str, Any]]]:
+    """Run or read a level's definition, wherever it comes from."""
+    if level_number in _registered:
+        builder = _LevelBuilder()
+        level_data = _registered[level_number](builder)
+        return builder.rooms, level_data
+
+    level_path = os.path.join(LEVEL_DIR, f"level{level_number:02d}.json")
+    if os.path.exists(level_path):
+        # Only needed for level files, so kept out of game startup
+        from level_format import build_level, read_level_file
+
+        return build_level(read_level_file(level_path))
+
+    # Import the level module dynamically
+    try:
+        level_module = importlib.import_module(f"level{level_number:02d}")
+    except ImportError:
+        return None
+
+    builder = _LevelBuilder()
+    level_data = level_module.initialize_level(builder)
+    return builder.rooms, level_data
+
 
 def load_level(game, level_number: int) -> Dict[str, Any]:
     """
     Load a specific level into the game.
-    
+
     Args:
         game: The Game instance to load the level into
         level_number: The level number to load
-        
+
     Returns:
-        Dict containing level metadata
+        Dict containing level metadata, shared between games and
+        not to be modified
     """
     # Clear any existing game state
     game.rooms = {}
     game.boss = None
-    
-    # Import the level module dynamically
-    try:
-        level_module = importlib.import_module(f"level{level_number:02d}")
-    except ImportError:
-        print(f"Error: Level {level_number} does not exist!")
+
+    template = compile_level(level_number)
+    if not template:
+        game.output.print(f"Error: Level {level_number} does not exist!")
         return None
-    
-    # Initialize the level
-    level_data = level_module.initialize_level(game)
-    
+
+    game.rooms = template.instantiate()
+    game.level_analysis = template.analysis
+    level_data = template.level_data
+
     # Set up the boss from level data
     if "boss" in level_data:
         boss_data = level_data["boss"]
@@ -35,15 +305,20 @@ def load_level(game, level_number: int) -> Dict[str, Any]:
             boss_data["health"],
             boss_data["power"]
         )
-    
+
     # Set required items from level data
     if "required_items" in level_data:
         game.required_items = level_data["required_items"]
-    
+
     # Set starting room from level data
     if "starting_room" in level_data:
         game.starting_room_id = level_data["starting_room"]
     else:
         game.starting_room_id = "start"  # Default
-    
+
+    # Drop the previous level's verbs, then add any this level provides
+    game.commands = game.COMMANDS
+    for verb, handler in level_data.get("commands", {}).items():
+        game.register_command(verb, handler)
+
     return level_data
@@ -1,13 +1,42 @@
-import os
-import random
 import time
-from typing import Dict, List, Optional, Tuple
-
+from functools import partial
+from typing import TYPE_CHECKING, List, Optional
+
+from commands import (
+    DIRECTION_ALIASES, Command, CommandRegistry, Handler
+)
+from combat import (
+    CombatLog, battle_odds, effective_boss_power, fight_rounds, new_rng
+)
 from game_classes import Item, Room, Player
-from level_manager import load_level
+from level_graph import BOSS_ROOM_ID, LevelGraph
+from level_manager import (
+    LevelRooms, available_levels, compile_level, load_level, prefetch_level
+)
+from output import OutputSink, StdoutSink
+from pacing import DelayPacer, Steps
+
+if TYPE_CHECKING:
+    import random
+
 
 class Game:
-    def __init__(self):
+    # Verbs understood by every game; see register_command for more
+    COMMANDS = CommandRegistry()
+
+    def __init__(
+        self, seed: Optional[int] = None, pacer=None,
+        output: Optional[OutputSink] = None
+    ):
+        # Buffers everything the game says until the next flush
+        self.output = output or StdoutSink()
+        # Runs battle rounds; see pacing for headless and hosted pacers
+        self.pacer = pacer or DelayPacer()
+        self.battle_in_progress = False
+        self.seed = seed  # Seeds this game's random stream, see rng
+        self._rng = None
+        self.combat_log = None  # CombatLog of the last boss battle
+        self.commands = self.COMMANDS  # Copied on first register_command
         self.rooms = {}
         self.player = None
         self.boss = None
@@ -15,10 +44,35 @@ class Game:
         self.required_items = 6  # Default, will be overridden by level data
         self.current_level = 1
         self.starting_room_id = "start"  # Default, will be overridden by level data
+        self.level_analysis = None  # Set by load_level, see level_graph
+        self._own_graph = None  # (analysis, graph) once this game's exits differ
+        self.prefetch_next_level = True  # Build it while this one is played
+        self.transition_times = []  # Seconds taken by each level change
+        self.transcript = None  # Text file recording the commands typed
+
+    @property
+    def rng(self) -> "random.Random":
+        """This game's own random number stream, created on first use."""
+        if self._rng is None:
+            self._rng = new_rng(self.seed)
+        return self._rng
 
     def add_room(self, room_id: str, room: Room) -> None:
         self.rooms[room_id] = room
 
+    def peek_room(self, room_id: str) -> Room:
+        """
+        Return a room for reading only.
+
+        Unlike self.rooms[room_id], this does not copy the room out of the
+        level, so a room this game never changed is rendered once for
+        every game playing the level.
+        """
+        rooms = self.rooms
+        if isinstance(rooms, LevelRooms):
+            return rooms.peek(room_id)
+        return rooms[room_id]
+
     def create_boss(self, name: str, description: str, health: int, power: int) -> None:
         self.boss = {
             "name": name,
@@ -32,81 +86,137 @@ class Game:
         level_data = load_level(self, self.current_level)
         
         if not level_data:
-            print("Error loading level. Exiting game.")
+            self.output.print("Error loading level. Exiting game.")
             self.game_over = True
             return
             
-        print(f"\nLevel {self.current_level}: {level_data['name']}")
-        print(level_data['description'])
-        print(f"You must find {self.required_items} magical items to defeat the boss.")
+        self.output.print(f"\nLevel {self.current_level}: {level_data['name']}")
+        self.output.print(level_data['description'])
+        self.output.print(f"You must find {self.required_items} magical items to defeat the boss.")
+
+        if self.prefetch_next_level:
+            prefetch_level(self.current_level + 1)
 
     def start(self) -> None:
-        print("Welcome to the D&D Text Adventure!")
-        player_name = input("What is your name, brave adventurer? ")
+        output = self.output
+        output.print("Welcome to the D&D Text Adventure!")
+        output.write("What is your name, brave adventurer? ")
+        output.flush()
+        player_name = input()
+        if self.transcript:
+            self.transcript.write(f"# name: {player_name}\n")
+            if self.seed is not None:
+                self.transcript.write(f"# seed: {self.seed}\n")
+        self.begin(player_name)
+
+        if not self.game_over:
+            self.game_loop()
+        output.flush()
+
+    def begin(self, player_name: str) -> None:
+        """Create the player and load the first level."""
         self.player = Player(player_name)
 
-        print(f"\nWelcome, {self.player.name}!")
-        print("\nCommands: go [direction], look, inventory, take [item], drop [item], quit")
+        self.output.print(f"\nWelcome, {self.player.name}!")
+        self.output.print(
+            "\nCommands: go [direction], look, inventory, take [item], "
+            "drop [item], travel [room], goto [item], quit"
+        )
 
         self.initialize_game()
-        
+
         if not self.game_over:
             # Set player's starting room from level data
             self.player.current_room_id = self.starting_room_id
-            self.game_loop()
 
     def game_loop(self) -> None:
         while not self.game_over:
-            current_room = self.rooms[self.player.current_room_id]
-            current_room.display()
-
-            command = input("\nWhat would you like to do? ").lower().strip()
+            current_room = self.peek_room(self.player.current_room_id)
+            current_room.display(self.output)
+
+            # The command's output, the room and the prompt in one write
+            self.output.write("\nWhat would you like to do? ")
+            self.output.flush()
+            command = input().lower().strip()
+            if self.transcript:
+                self.transcript.write(command + "\n")
             self.process_command(command)
+        self.output.flush()
 
     def process_command(self, command: str) -> None:
-        parts = command.split()
-
-        if not parts:
-            print("Please enter a command.")
-            return
+        handler, parsed = self.commands.resolve(command)
 
-        action = parts[0]
-
-        if action == "quit":
-            self.game_over = True
-            print("Thanks for playing!")
-            return
-
-        if action == "look":
-            return  # Room will be displayed again in the next loop iteration
-
-        if action == "inventory":
-            self.player.display_inventory()
-            return
-
-        if action == "go" and len(parts) > 1:
-            direction = parts[1]
-            self.move_player(direction)
-            return
-
-        if action == "take" and len(parts) > 1:
-            item_name = " ".join(parts[1:])
-            self.take_item(item_name)
-            return
-
-        if action == "drop" and len(parts) > 1:
-            item_name = " ".join(parts[1:])
-            self.drop_item(item_name)
-            return
-
-        print("I don't understand that command.")
+        if handler:
+            handler(self, parsed)
+        elif not parsed:
+            self.output.print("Please enter a command.")
+        else:
+            self.output.print("I don't understand that command.")
+
+    def register_command(
+        self, verb: str, handler: Handler, *aliases: str,
+        needs_argument: bool = False
+    ) -> None:
+        """
+        Add a verb to this game only, e.g. one provided by a level.
+
+        Verbs added this way last until the next level is loaded.
+        """
+        if self.commands is self.COMMANDS:
+            self.commands = self.COMMANDS.copy()
+        self.commands.register(
+            verb, handler, *aliases, needs_argument=needs_argument
+        )
+
+    @COMMANDS.verb("quit", "q")
+    def _quit_command(self, command: Command) -> None:
+        self.game_over = True
+        self.output.print("Thanks for playing!")
+
+    @COMMANDS.verb("look", "l")
+    def _look_command(self, command: Command) -> None:
+        pass  # Room will be displayed again in the next loop iteration
+
+    @COMMANDS.verb("inventory", "i", "inv")
+    def _inventory_command(self, command: Command) -> None:
+        self.player.display_inventory(self.output)
+
+    @COMMANDS.verb("go", "move", needs_argument=True)
+    def _go_command(self, command: Command) -> None:
+        direction = command.args[0]
+        self.move_player(DIRECTION_ALIASES.get(direction, direction))
+
+    @COMMANDS.verb("north", "n")
+    @COMMANDS.verb("south", "s")
+    @COMMANDS.verb("east", "e")
+    @COMMANDS.verb("west", "w")
+    @COMMANDS.verb("up", "u")
+    @COMMANDS.verb("down", "d")
+    def _direction_command(self, command: Command) -> None:
+        self.move_player(DIRECTION_ALIASES.get(command.verb, command.verb))
+
+    @COMMANDS.verb("travel", needs_argument=True)
+    def _travel_command(self, command: Command) -> None:
+        self.travel_to(command.argument)
+
+    @COMMANDS.verb("goto", needs_argument=True)
+    def _goto_command(self, command: Command) -> None:
+        self.go_to_item(command.argument)
+
+    @COMMANDS.verb("take", "get", needs_argument=True)
+    def _take_command(self, command: Command) -> None:
+        self.take_item(command.argument)
+
+    @COMMANDS.verb("drop", needs_argument=True)
+    def _drop_command(self, command: Command) -> None:
+        self.drop_item(command.argument)
 
     def move_player(self, direction: str) -> None:
-        current_room = self.rooms[self.player.current_room_id]
+        current_room = self.peek_room(self.player.current_room_id)
         new_room_id = current_room.get_connection(direction)
 
         if not new_room_id:
-            print(f"You can't go {direction} from here.")
+            self.output.print(f"You can't go {direction} from here.")
             return
 
         self.player.current_room_id = new_room_id
@@ -115,101 +225,231 @@ class Game:
         if new_room_id == "boss":
             self.check_boss_encounter()
 
-    def take_item(self, item_name: str) -> None:
-        current_room = self.rooms[self.player.current_room_id]
-        item = current_room.remove_item(item_name)
+    def route_graph(self) -> LevelGraph:
+        """Graph of this game's rooms and exits, for finding routes."""
+        rooms = self.rooms
+        analysis = self.level_analysis
+        if not isinstance(rooms, LevelRooms) or analysis is None:
+            return LevelGraph(rooms)
+
+        # Share the level's graph and routing tables until an exit in
+        # this game differs from the level
+        if self._own_graph and self._own_graph[0] is analysis:
+            graph = self._own_graph[1]
+        else:
+            graph = analysis.graph
+        changed = list(rooms.changed_exits())
+        if changed:
+            if graph is analysis.graph:
+                graph = graph.copy()
+                self._own_graph = (analysis, graph)
+            graph.update_rooms(rooms, changed)
+        return graph
+
+    def travel_to(self, destination: str) -> None:
+        """Walk along the shortest route to a room, given its name or ID."""
+        graph = self.route_graph()
+        room_index = graph.index.get(destination)
+        if room_index is None:
+            room_index = graph.names.get(destination.casefold())
+        if room_index is None:
+            self.output.print(f"You don't know of any place called {destination}.")
+            return
+        room_id = graph.room_ids[room_index]
+        if room_id == self.player.current_room_id:
+            self.output.print("You are already there.")
+            return
 
-        if not item:
-            print(f"There is no {item_name} here.")
+        # Routes never pass through the boss room, only end in it
+        path = graph.route(
+            self.player.current_room_id, room_id, avoid=[BOSS_ROOM_ID]
+        )
+        if not path:
+            self.output.print(f"You can't find a way to {self.peek_room(room_id).name}.")
+            return
+        self._travel(path)
+
+    def go_to_item(self, item_name: str) -> None:
+        """Walk to the nearest room holding an item."""
+        graph = self.route_graph()
+        rooms = self.rooms
+        # Only rooms this game changed can hold items elsewhere than the
+        # level placed them
+        changed = {}
+        if isinstance(rooms, LevelRooms):
+            changed = {
+                room_id: item_name in rooms.peek(room_id).items
+                for room_id in rooms.copied()
+            }
+        path = graph.route_to_item(
+            self.player.current_room_id, item_name, changed,
+            avoid=[BOSS_ROOM_ID]
+        )
+        if path is None:
+            self.output.print(f"You don't know where to find {item_name}.")
+            return
+        if not path:
+            self.output.print("You are already there.")
+            return
+        self._travel(path)
+
+    def _travel(self, path: List[str]) -> None:
+        room_id = self.player.current_room_id = path[-1]
+        moves = "move" if len(path) == 1 else "moves"
+        self.output.print(
+            f"After {len(path)} {moves}, you arrive at the "
+            f"{self.peek_room(room_id).name}."
+        )
+        if room_id == BOSS_ROOM_ID:
+            self.check_boss_encounter()
+
+    def take_item(self, item_name: str) -> None:
+        room_id = self.player.current_room_id
+        # Only copy the room from the level once something is taken
+        if item_name not in self.peek_room(room_id).items:
+            self.output.print(f"There is no {item_name} here.")
             return
 
-        self.player.add_to_inventory(item)
+        item = self.rooms[room_id].remove_item(item_name)
+        self.player.add_to_inventory(item, self.output)
 
     def drop_item(self, item_name: str) -> None:
         item = self.player.remove_from_inventory(item_name)
 
         if not item:
-            print(f"You don't have {item_name} in your inventory.")
+            self.output.print(f"You don't have {item_name} in your inventory.")
             return
 
         current_room = self.rooms[self.player.current_room_id]
         current_room.add_item(item)
-        print(f"You dropped {item.name}.")
+        self.output.print(f"You dropped {item.name}.")
 
     def check_boss_encounter(self) -> None:
         if len(self.player.inventory) < self.required_items:
-            print(f"\nAs you enter the chamber, the {self.boss['name']} rises before you!")
-            print("You realize you are ill-equipped to face such a powerful foe.")
-            print(f"The {self.boss['name']}'s attack engulfs you before you can react.")
-            print(f"\nGAME OVER - You need to find more magical items before facing the boss.")
+            self.output.print(f"\nAs you enter the chamber, the {self.boss['name']} rises before you!")
+            self.output.print("You realize you are ill-equipped to face such a powerful foe.")
+            self.output.print(f"The {self.boss['name']}'s attack engulfs you before you can react.")
+            self.output.print(f"\nGAME OVER - You need to find more magical items before facing the boss.")
             self.game_over = True
             return
 
-        print(f"\nYou enter the chamber, and the {self.boss['name']} rises before you!")
-        print("But with your magical items, you are prepared for this battle.")
+        self.output.print(f"\nYou enter the chamber, and the {self.boss['name']} rises before you!")
+        self.output.print("But with your magical items, you are prepared for this battle.")
         self.boss_battle()
 
     def boss_battle(self) -> None:
         boss = self.boss
-        print(f"\n=== BOSS BATTLE: {boss['name']} ===")
-        print(boss['description'])
+        self.output.print(f"\n=== BOSS BATTLE: {boss['name']} ===")
+        self.output.print(boss['description'])
 
         player_power = self.player.get_total_power()
-        effective_boss_power = max(10, boss['power'] - player_power)
+        boss_power = effective_boss_power(boss['power'], player_power)
 
-        print(f"\nYour Power: {player_power}")
-        print(f"{boss['name']}'s Power: {effective_boss_power}")
+        self.output.print(f"\nYour Power: {player_power}")
+        self.output.print(f"{boss['name']}'s Power: {boss_power}")
 
-        input("\nPress Enter to begin the battle...")
+        self.combat_log = CombatLog(
+            player_power, self.player.health, boss['health'], boss_power
+        )
+        self.battle_in_progress = True
+        self.pacer.run(self._battle_steps(), self._end_battle)
 
-        boss_health = boss['health']
-        player_health = self.player.health
-
-        round_num = 1
-        while boss_health > 0 and player_health > 0:
-            print(f"\n--- Round {round_num} ---")
-
-            # Player attacks
-            player_damage = random.randint(player_power // 2, player_power)
-            boss_health -= player_damage
-            print(f"You attack the {boss['name']} for {player_damage} damage!")
+    def _battle_steps(self) -> Steps:
+        """Show the odds, then fight the battle, pausing after each round."""
+        boss = self.boss
+        log = self.combat_log
+        # Solving the odds can take a while, so the pacer runs it, off the
+        # event loop in hosted games
+        odds = yield partial(
+            battle_odds, log.player_power, log.player_health, boss
+        )
+        self.output.print(
+            f"Your chance of victory: {odds.win_probability:.1%} "
+            f"(about {odds.expected_rounds:.1f} rounds)"
+        )
+
+        self.output.flush()
+        self.pacer.confirm("\nPress Enter to begin the battle...")
+
+        rounds = fight_rounds(
+            log.player_power, log.player_health,
+            log.boss_health, log.boss_power, self.rng
+        )
+        for battle_round in rounds:
+            log.record(battle_round)
+            round_num, player_damage, boss_damage = battle_round[:3]
+            player_health, boss_health = battle_round[3:]
+            self.output.print(f"\n--- Round {round_num} ---")
+            self.output.print(f"You attack the {boss['name']} for {player_damage} damage!")
 
             if boss_health <= 0:
                 break
 
-            # Boss attacks
-            boss_damage = random.randint(effective_boss_power // 3, effective_boss_power)
-            player_health -= boss_damage
-            print(f"The {boss['name']} attacks you for {boss_damage} damage!")
+            self.output.print(f"The {boss['name']} attacks you for {boss_damage} damage!")
 
-            print(f"\nYour Health: {player_health}")
-            print(f"{boss['name']}'s Health: {boss_health}")
+            self.output.print(f"\nYour Health: {player_health}")
+            self.output.print(f"{boss['name']}'s Health: {boss_health}")
+            self.output.flush()
+            yield
 
-            time.sleep(1)
-            round_num += 1
+        next_level = self.current_level + 1
+        if log.final_health()[0] > 0 and next_level in available_levels():
+            # The next level may still be building in the background, so
+            # wait for it through the pacer, off the event loop in hosted
+            # games, rather than in advance_to_next_level
+            yield partial(compile_level, next_level, False)
+
+    def _end_battle(self) -> None:
+        boss = self.boss
+        self.battle_in_progress = False
+        player_health, _ = self.combat_log.final_health()
 
         if player_health <= 0:
-            print(f"\nThe {boss['name']} has defeated you!")
-            print("GAME OVER")
+            self.output.print(f"\nThe {boss['name']} has defeated you!")
+            self.output.print("GAME OVER")
+            self.game_over = True
         else:
-            print(f"\nYou have defeated the {boss['name']}!")
+            self.output.print(f"\nYou have defeated the {boss['name']}!")
             self.advance_to_next_level()
 
-        self.game_over = True
-        
     def advance_to_next_level(self) -> None:
-        # This method would handle advancing to the next level
-        # For now, we'll just show a victory message
-        print("Congratulations! You have completed the adventure!")
-        print("\nTo be continued in the next level...")
-        
-        # In a more complete implementation, you would:
-        # 1. Increment self.current_level
-        # 2. Reset player's position but keep inventory
-        # 3. Load the next level
-        # 4. Set game_over to False to continue playing
+        """Move on to the next level, keeping the player's inventory."""
+        if self.current_level + 1 not in available_levels():
+            self.output.print("Congratulations! You have completed the adventure!")
+            self.game_over = True
+            return
+
+        start = time.perf_counter()
+        self.current_level += 1
+        self.initialize_game()
+        if not self.game_over:
+            self.player.current_room_id = self.starting_room_id
+        self.transition_times.append(time.perf_counter() - start)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="The D&D Text Adventure")
+    parser.add_argument(
+        "--battle-delay", type=float, default=1.0,
+        help="seconds between boss battle rounds (default: 1)"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--record", metavar="FILE",
+        help="save the commands you type as a transcript for replay.py"
+    )
+    args = parser.parse_args()
+
+    game = Game(seed=args.seed, pacer=DelayPacer(args.battle_delay))
+    if not args.record:
+        game.start()
+        return
+    with open(args.record, "w", encoding="utf-8") as transcript:
+        game.transcript = transcript
+        game.start()
 
 
 if __name__ == "__main__":
-    game = Game()
-    game.start()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""Buffered destinations for the text a game prints.
+
+A game writes everything it says to its output sink, which collects the
+text until `flush` delivers it in a single write. The game loop flushes
+once per command (and once per battle round), however many lines the
+command printed.
+
+    game = Game(output=MemorySink())  # Headless, e.g. for tests
+"""
+import sys
+from abc import ABC, abstractmethod
+from typing import List
+
+
+class OutputSink(ABC):
+    """Collects text and delivers it in one piece when flushed."""
+
+    __slots__ = ("_parts",)
+
+    def __init__(self):
+        self._parts: List[str] = []
+
+    def write(self, text: str) -> None:
+        self._parts.append(text)
+
+    def print(self, *values: object, sep: str = " ", end: str = "\n") -> None:
+        """Like the built-in print, but into this sink's buffer."""
+        if len(values) == 1 and isinstance(values[0], str):
+            self._parts.append(values[0] + end)
+        else:
+            self._parts.append(sep.join(map(str, values)) + end)
+
+    def flush(self) -> None:
+        """Deliver everything written since the last flush."""
+        if self._parts:
+            text = "".join(self._parts)
+            self._parts.clear()
+            self.deliver(text)
+
+    @abstractmethod
+    def deliver(self, text: str) -> None:
+        """Send flushed text to its destination."""
+
+
+class StdoutSink(OutputSink):
+    """Write to whatever sys.stdout is at the time of the flush."""
+
+    __slots__ = ()
+
+    def deliver(self, text: str) -> None:
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+
+class StreamSink(OutputSink):
+    """
+    Write encoded text to a byte stream, e.g. an asyncio StreamWriter.
+
+    Args:
+        stream: Any object with a write(bytes) method
+        newline: Line ending to send, e.g. "\\r\\n" for network clients
+    """
+
+    __slots__ = ("stream", "newline")
+
+    def __init__(self, stream, newline: str = "\n"):
+        super().__init__()
+        self.stream = stream
+        self.newline = newline
+
+    def deliver(self, text: str) -> None:
+        if self.newline != "\n":
+            text = text.replace("\n", self.newline)
+        self.stream.write(text.encode("utf-8"))
+
+
+class SocketSink(StreamSink):
+    """Send encoded text over a blocking socket."""
+
+    __slots__ = ()
+
+    def deliver(self, text: str) -> None:
+        if self.newline != "\n":
+            text = text.replace("\n", self.newline)
+        self.stream.sendall(text.encode("utf-8"))
+
+
+class MemorySink(OutputSink):
+    """Keep everything in memory, e.g. to check a game's output in tests."""
+
+    __slots__ = ("flushes",)
+
+    def __init__(self):
+        super().__init__()
+        self.flushes: List[str] = []  # The text delivered by each flush
+
+    def deliver(self, text: str) -> None:
+        self.flushes.append(text)
+
+    def getvalue(self) -> str:
+        """All text written so far, flushed or not."""
+        return "".join(self.flushes) + "".join(self._parts)
+
+
+class NullSink(OutputSink):
+    """Discard all output, for headless games such as benchmarks."""
+
+    __slots__ = ()
+
+    def write(self, text: str) -> None:
+        pass
+
+    def print(self, *values: object, sep: str = " ", end: str = "\n") -> None:
+        pass
+
+    def deliver(self, text: str) -> None:
+        pass
@@ -0,0 +1,108 @@
+"""Pacing of boss battle rounds.
+
+A battle is handed to its game's pacer as a generator of steps, one per
+round, plus a callback for when the battle is over. The pacer decides
+when each step runs: all at once, after a delay, or from timers on an
+event loop, so that a hosted battle never blocks a thread.
+
+A step may also yield slow work, as a function taking no arguments. The
+pacer calls it, on an executor thread when hosted, and sends its result
+back into the generator without pausing.
+"""
+import time
+from typing import Any, Callable, Generator, Optional
+
+# Yields None after a round, or a function whose result it needs
+Steps = Generator[Optional[Callable[[], Any]], Any, None]
+
+
+class InstantPacer:
+    """Run every round immediately, for headless games and tests."""
+
+    def confirm(self, prompt: str) -> None:
+        """Wait for the player to start the battle."""
+
+    def run(self, steps: Steps, finish: Callable[[], None]) -> None:
+        result = None
+        while True:
+            try:
+                work = steps.send(result)
+            except StopIteration:
+                break
+            if work:
+                result = work()
+            else:
+                result = None
+                self.pause()
+        finish()
+
+    def pause(self) -> None:
+        """Wait between rounds."""
+
+
+class DelayPacer(InstantPacer):
+    """Pause between rounds and ask before starting, for the local CLI."""
+
+    def __init__(self, delay: float = 1.0, ask: bool = True):
+        self.delay = delay
+        self.ask = ask
+
+    def confirm(self, prompt: str) -> None:
+        if self.ask:
+            input(prompt)
+
+    def pause(self) -> None:
+        if self.delay > 0:
+            time.sleep(self.delay)
+
+
+class EventLoopPacer(InstantPacer):
+    """
+    Run one round per timer callback on an asyncio event loop.
+
+    `run` returns as soon as the battle is scheduled. Await `wait()` to
+    find out when it is over. Slow work yielded by the battle runs in the
+    loop's default executor.
+    """
+
+    def __init__(self, delay: float = 1.0):
+        self.delay = delay
+        self._done = None
+
+    def run(self, steps: Steps, finish: Callable[[], None]) -> None:
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        done = self._done = loop.create_future()
+
+        def step(result: Any = None) -> None:
+            try:
+                work = steps.send(result)
+            except StopIteration:
+                finish()
+                done.set_result(None)
+                return
+            except Exception as error:
+                done.set_exception(error)
+                return
+            if work:
+                # Slow work would hold up every other session on the loop
+                loop.run_in_executor(None, work).add_done_callback(resume)
+            else:
+                loop.call_later(self.delay, step)
+
+        def resume(future: "asyncio.Future") -> None:
+            error = future.exception()
+            if error is not None:
+                done.set_exception(error)
+            else:
+                step(future.result())
+
+        # The first round also runs from the loop, after the output of
+        # the command that started the battle
+        loop.call_soon(step)
+
+    async def wait(self) -> None:
+        """Return once the most recently started battle is over."""
+        if self._done is not None:
+            await self._done
@@ -0,0 +1,278 @@
+"""Replay recorded game transcripts headlessly, for load testing.
+
+A transcript is a text file with one command per line, as typed at the
+game's prompt, e.g. recorded with `python main.py --record FILE`. Lines
+starting with "#" set up the session:
+
+    # name: Ann
+    # seed: 42
+    go north
+    take sword
+
+Every transcript is played by a new game with no console I/O: output goes
+to a NullSink and boss battles run at once. Transcripts are spread over
+a process pool, and the run reports commands per second, per-command
+latency percentiles and the peak memory of the worker processes.
+
+    python replay.py transcripts/ --workers 8
+    python replay.py --generate 5000 transcripts/
+"""
+import os
+import sys
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from main import Game
+from output import NullSink
+from pacing import InstantPacer
+
+Transcript = Tuple[Dict[str, str], List[str]]
+
+
+def read_transcript(path: str) -> Transcript:
+    """Return (settings, commands) of a transcript file."""
+    settings = {}
+    commands = []
+    with open(path, encoding="utf-8") as transcript_file:
+        for line in transcript_file:
+            line = line.rstrip("\n")
+            if line.startswith("#"):
+                key, _, value = line[1:].partition(":")
+                settings[key.strip()] = value.strip()
+            else:
+                commands.append(line.lower().strip())
+    return settings, commands
+
+
+def replay(transcript: Transcript, latencies: array) -> int:
+    """
+    Play one transcript the way Game.game_loop would.
+
+    Args:
+        transcript: (settings, commands) from read_transcript
+        latencies: Seconds taken by each command are appended here
+
+    Returns:
+        Number of commands played; the rest are skipped once the game
+        is over
+    """
+    settings, commands = transcript
+    seed = settings.get("seed")
+    game = Game(
+        seed=int(seed) if seed else None,
+        pacer=InstantPacer(), output=NullSink()
+    )
+    game.begin(settings.get("name", "Replay"))
+    clock = time.perf_counter
+    played = 0
+    for command in commands:
+        if game.game_over:
+            break
+        start = clock()
+        game.peek_room(game.player.current_room_id).display(game.output)
+        game.process_command(command)
+        latencies.append(clock() - start)
+        played += 1
+    return played
+
+
+def peak_rss() -> Optional[int]:
+    """Peak resident memory of this process in bytes, where known."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def replay_files(paths: List[str]) -> Tuple[int, array, Optional[int]]:
+    """Worker: replay transcripts, returning (commands, latencies, RSS)."""
+    latencies = array("d")
+    commands = 0
+    for path in paths:
+        commands += replay(read_transcript(path), latencies)
+    return commands, latencies, peak_rss()
+
+
+class ReplayReport:
+    """Throughput, latency and memory of a replay run."""
+
+    def __init__(
+        self, transcripts: int, commands: int, seconds: float,
+        latencies: array, peak_rss: Optional[int]
+    ):
+        self.transcripts = transcripts
+        self.commands = commands
+        self.seconds = seconds
+        self.latencies = sorted(latencies)
+        self.peak_rss = peak_rss  # Largest of any worker, in bytes
+
+    @property
+    def commands_per_second(self) -> float:
+        return self.commands / self.seconds if self.seconds else 0.0
+
+    def percentile(self, percent: float) -> float:
+        if not self.latencies:
+            return 0.0
+        index = min(
+            len(self.latencies) - 1,
+            int(len(self.latencies) * percent / 100)
+        )
+        return self.latencies[index]
+
+    def summary(self) -> str:
+        lines = [
+            f"Transcripts: {self.transcripts:,}",
+            f"Commands: {self.commands:,} in {self.seconds:.2f} s",
+            f"Commands/second: {self.commands_per_second:,.0f}",
+            f"p50 latency: {self.percentile(50) * 1e6:.1f} us",
+            f"p99 latency: {self.percentile(99) * 1e6:.1f} us",
+        ]
+        if self.peak_rss is not None:
+            lines.append(
+                f"Peak RSS per worker: {self.peak_rss / 2**20:.1f} MiB"
+            )
+        return "\n".join(lines)
+
+
+def replay_all(
+    paths: List[str], workers: Optional[int] = None, chunk_size: int = 50
+) -> ReplayReport:
+    """
+    Replay many transcripts across a pool of worker processes.
+
+    Args:
+        paths: Transcript files to replay
+        workers: Worker processes, one per CPU by default; 0 replays in
+            this process
+        chunk_size: Transcripts handed to a worker at a time
+    """
+    chunks = [
+        paths[start:start + chunk_size]
+        for start in range(0, len(paths), chunk_size)
+    ]
+    latencies = array("d")
+    commands = 0
+    peak = None
+    start = time.perf_counter()
+    if workers == 0:
+        results: Iterable = map(replay_files, chunks)
+        pool = None
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(workers)
+        results = pool.map(replay_files, chunks)
+    try:
+        for chunk_commands, chunk_latencies, rss in results:
+            commands += chunk_commands
+            latencies.extend(chunk_latencies)
+            if rss is not None:
+                peak = max(peak or 0, rss)
+    finally:
+        if pool:
+            pool.shutdown()
+    seconds = time.perf_counter() - start
+    return ReplayReport(len(paths), commands, seconds, latencies, peak)
+
+
+def generate_transcripts(
+    directory: str, count: int, commands: int = 100, seed: int = 0
+) -> List[str]:
+    """
+    Write synthetic transcripts of random walks through level 1.
+
+    Each walk takes any item it finds and wanders through random exits,
+    with a few looks, inventory checks and typos thrown in.
+    """
+    import random
+
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for number in range(count):
+        game = Game(
+            seed=number, pacer=InstantPacer(), output=NullSink()
+        )
+        game.begin(f"Player{number}")
+        lines = [f"# name: Player{number}", f"# seed: {number}"]
+        while len(lines) - 2 < commands and not game.game_over:
+            room = game.rooms[game.player.current_room_id]
+            roll = rng.random()
+            if room.items and roll < 0.8:
+                command = f"take {next(iter(room.items)).name.lower()}"
+            elif roll < 0.05:
+                command = rng.choice(["look", "inventory", "i", "dance"])
+            else:
+                # Only face the boss once ready for it
+                ready = len(game.player.inventory) >= game.required_items
+                exits = [
+                    direction
+                    for direction, room_id in room.connections.items()
+                    if ready or room_id != "boss"
+                ]
+                command = f"go {rng.choice(exits)}"
+            game.process_command(command)
+            lines.append(command)
+        path = os.path.join(directory, f"session{number:05d}.txt")
+        with open(path, "w", encoding="utf-8") as transcript_file:
+            transcript_file.write("\n".join(lines) + "\n")
+        paths.append(path)
+    return paths
+
+
+def transcript_paths(locations: Iterable[str]) -> List[str]:
+    """Transcript files given directly or found in given directories."""
+    paths = []
+    for location in locations:
+        if os.path.isdir(location):
+            paths.extend(sorted(
+                os.path.join(location, name)
+                for name in os.listdir(location) if name.endswith(".txt")
+            ))
+        else:
+            paths.append(location)
+    return paths
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Replay game transcripts to measure throughput."
+    )
+    parser.add_argument(
+        "transcripts", nargs="+",
+        help="transcript files, or directories of .txt transcripts"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="worker processes (default: one per CPU; 0: no pool)"
+    )
+    parser.add_argument(
+        "--generate", type=int, metavar="N",
+        help="first write N synthetic transcripts into the directory"
+    )
+    parser.add_argument(
+        "--commands", type=int, default=100,
+        help="commands per generated transcript (default: 100)"
+    )
+    args = parser.parse_args()
+
+    if args.generate:
+        if len(args.transcripts) != 1:
+            parser.error("--generate needs exactly one directory")
+        generate_transcripts(
+            args.transcripts[0], args.generate, args.commands
+        )
+    paths = transcript_paths(args.transcripts)
+    if not paths:
+        parser.error("no transcripts found")
+    print(replay_all(paths, args.workers).summary())
+
+
+if __name__ == "__main__":
+    main()
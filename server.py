@@ -0,0 +1,179 @@
+"""Serve many independent game sessions from one asyncio event loop.
+
+Each TCP connection gets its own `Game`. Commands are read one line at a
+time and handed to `Game.process_command`; the game's output sink writes
+everything it says back to that player's connection only, in one write
+per command. Boss battle rounds are paced by event loop timers, so a
+battle in one session never holds up the others.
+"""
+import argparse
+import asyncio
+from typing import Awaitable, Optional
+
+from main import Game
+from output import StreamSink
+from pacing import EventLoopPacer
+
+PROMPT = "\nWhat would you like to do? "
+
+
+class GameSession:
+    """One connected player and their game."""
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+        idle_timeout: Optional[float] = None, battle_delay: float = 1.0
+    ):
+        self.reader = reader
+        self.writer = writer
+        self.idle_timeout = idle_timeout
+        self.output = StreamSink(writer, newline="\r\n")
+        self.pacer = EventLoopPacer(battle_delay)
+        self.game = Game(pacer=self.pacer, output=self.output)
+
+    async def read_line(self) -> Optional[str]:
+        """Read one line from the player, or None if they have gone."""
+        self.output.flush()
+        await self.writer.drain()
+        try:
+            line = await asyncio.wait_for(
+                self.reader.readline(), self.idle_timeout
+            )
+        except (asyncio.TimeoutError, ValueError):  # Idle or line too long
+            return None
+        if not line:
+            return None
+        return line.decode("utf-8", "replace").strip()
+
+    async def run(self) -> None:
+        output = self.output
+        output.write("Welcome to the D&D Text Adventure!\n")
+        output.write("What is your name, brave adventurer? ")
+        player_name = await self.read_line()
+        if player_name is None:
+            return
+
+        game = self.game
+        game.begin(player_name)
+
+        while not game.game_over:
+            current_room = game.peek_room(game.player.current_room_id)
+            current_room.display(output)
+            output.write(PROMPT)
+
+            command = await self.read_line()
+            if command is None:
+                return
+            game.process_command(command.lower())
+            if game.battle_in_progress:
+                output.flush()
+                await self.pacer.wait()
+
+        output.flush()
+        await self.writer.drain()
+
+
+class GameServer:
+    """Accept connections and run a `GameSession` for each of them."""
+
+    def __init__(
+        self, max_sessions: int = 10_000, max_line: int = 1024,
+        idle_timeout: Optional[float] = 1800, battle_delay: float = 1.0
+    ):
+        self.max_sessions = max_sessions
+        self.max_line = max_line  # Bounds the per-session read buffer
+        self.idle_timeout = idle_timeout
+        self.battle_delay = battle_delay
+        self.sessions = 0
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        if self.sessions >= self.max_sessions:
+            writer.write(b"The realm is full. Please try again later.\r\n")
+            writer.close()
+            return
+
+        self.sessions += 1
+        session = GameSession(
+            reader, writer, self.idle_timeout, self.battle_delay
+        )
+        try:
+            await session.run()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(
+            self.handle_client, host, port, limit=self.max_line
+        )
+        addresses = ", ".join(
+            str(sock.getsockname()) for sock in server.sockets
+        )
+        print(f"Serving the D&D Text Adventure on {addresses}")
+        async with server:
+            await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Host the game for many players over TCP."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--max-sessions", type=int, default=10_000)
+    parser.add_argument(
+        "--idle-timeout", type=float, default=1800,
+        help="seconds before an idle player is disconnected"
+    )
+    parser.add_argument(
+        "--battle-delay", type=float, default=1.0,
+        help="seconds between boss battle rounds (default: 1)"
+    )
+    parser.add_argument(
+        "--metrics", metavar="FILE",
+        help="record command latencies and write them to this "
+        "Prometheus-format file every --metrics-interval seconds"
+    )
+    parser.add_argument("--metrics-interval", type=float, default=15)
+    args = parser.parse_args()
+
+    game_server = GameServer(
+        args.max_sessions, idle_timeout=args.idle_timeout,
+        battle_delay=args.battle_delay
+    )
+    serving = game_server.serve(args.host, args.port)
+    if args.metrics:
+        serving = serve_with_metrics(
+            serving, args.metrics, args.metrics_interval
+        )
+    try:
+        asyncio.run(serving)
+    except KeyboardInterrupt:
+        pass
+
+
+async def serve_with_metrics(
+    serving: Awaitable[None], path: str, interval: float
+) -> None:
+    """Serve with instrumentation on, writing the metrics periodically."""
+    # Only loaded when asked for, as measuring adds to every command
+    from instrumentation import disable_instrumentation, enable_instrumentation
+
+    metrics = enable_instrumentation()
+    server_task = asyncio.ensure_future(serving)
+    try:
+        while not server_task.done():
+            await asyncio.wait([server_task], timeout=interval)
+            metrics.write_prometheus(path)
+        await server_task
+    finally:
+        server_task.cancel()
+        disable_instrumentation()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""Compact snapshots of a game's state, for saving and restoring games.
+
+A snapshot records only how a game differs from its level template: the
+player, and the rooms whose items, item positions or exits changed.
+Items placed by the level are stored as their number in the level's item
+list (see LevelTemplate.items), two bytes each, so a snapshot of a game
+in progress is usually a few hundred bytes whatever the size of the
+level. Once a game has drawn from its random stream, the stream's state
+is saved too (about 2.5 KB), so a restored game rolls the same damage as
+the original would have.
+
+    data = save_game(game)
+    game = Game()
+    restore_game(game, data)
+
+A `SnapshotWriter` keeps the encoded state of every changed room and only
+encodes a room again once its version changes, so saving after every
+command costs time in proportion to what the command changed.
+
+Snapshots are taken between commands and are only valid for the level
+definition they were taken from.
+"""
+import marshal
+import struct
+import sys
+from array import array
+from typing import (
+    TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+)
+
+from combat import new_rng
+from game_classes import Item, ItemStore, Player, Room
+from level_manager import LevelRooms, compile_level, load_level
+
+if TYPE_CHECKING:
+    import random
+
+# magic, format version, level number, items in the level
+_HEADER = struct.Struct("<4sBHI")
+_MAGIC = b"DNDS"
+_VERSION = 1
+
+# Item number standing for the next item stored in full, i.e. one the
+# level did not place
+_INLINE = 0xFFFF
+
+
+def _typecode(item_count: int) -> str:
+    return "H" if item_count < _INLINE else "I"
+
+
+def _inline_marker(typecode: str) -> int:
+    return _INLINE if typecode == "H" else 0xFFFFFFFF
+
+
+class SnapshotWriter:
+    """Take repeated snapshots of one game, re-encoding only what changed."""
+
+    def __init__(self, game):
+        self.game = game
+        self._template = None
+        self._numbers: Dict[int, int] = {}  # id(item) -> item number
+        # room_id -> (room, room version, encoded room or None)
+        self._rooms: Dict[str, Tuple[Room, int, Optional[Tuple]]] = {}
+
+    def save(self) -> bytes:
+        """Encode the game's current state."""
+        game = self.game
+        if not isinstance(game.rooms, LevelRooms):
+            raise ValueError("only games loaded with load_level can be saved")
+        template = compile_level(game.current_level)
+        if template is not self._template:
+            self._template = template
+            self._numbers = {
+                id(item): number for number, item in enumerate(template.items)
+            }
+            self._rooms = {}
+
+        rooms = game.rooms
+        cache = self._rooms
+        encoded_rooms = []
+        current = {}
+        for room_id in rooms.copied():
+            room = rooms.peek(room_id)
+            cached = cache.get(room_id)
+            if (cached is None or cached[0] is not room
+                    or cached[1] != room._version):
+                encoded = self._encode_room(room_id, room)
+                cached = (room, room._version, encoded)
+            current[room_id] = cached
+            if cached[2] is not None:
+                encoded_rooms.append(cached[2])
+        self._rooms = current
+
+        player = game.player
+        state = (
+            game.seed,
+            game.game_over,
+            (
+                player.name, player.health, player.current_room_id,
+                *self._encode_items(player.inventory)
+            ),
+            tuple(encoded_rooms),
+            tuple(rooms.removed()),
+            None if game._rng is None else _encode_rng(game._rng),
+        )
+        header = _HEADER.pack(
+            _MAGIC, _VERSION, game.current_level, len(template.items)
+        )
+        return header + marshal.dumps(state)
+
+    def _encode_room(self, room_id: str, room: Room) -> Optional[Tuple]:
+        """A room's differences from the level, or None if there are none."""
+        original = self._template.rooms.get(room_id)
+        positions = room._item_positions or {}
+        if original is None:
+            details = (
+                room.name, room.description, room._base_ascii_art, room.theme
+            )
+            return (
+                room_id, *self._encode_items(room.items),
+                positions, dict(room.connections), details
+            )
+
+        same_items = room.items is original.items or (
+            len(room.items) == len(original.items)
+            and all(a is b for a, b in zip(room.items, original.items))
+        )
+        same_positions = positions == (original._item_positions or {})
+        same_exits = room.connections is original.connections or (
+            room.connections == original.connections
+        )
+        if same_items and same_positions and same_exits:
+            return None
+        return (
+            room_id, *self._encode_items(room.items),
+            None if same_positions else positions,
+            None if same_exits else dict(room.connections),
+            None
+        )
+
+    def _encode_items(self, items: Iterable[Item]) -> Tuple[bytes, Tuple]:
+        """(item numbers, full (name, description, power) of the rest)"""
+        typecode = _typecode(len(self._numbers))
+        marker = _inline_marker(typecode)
+        numbers = array(typecode)
+        inline = []
+        for item in items:
+            number = self._numbers.get(id(item))
+            if number is None:
+                numbers.append(marker)
+                inline.append((item.name, item.description, item.power))
+            else:
+                numbers.append(number)
+        if sys.byteorder == "big":
+            numbers.byteswap()
+        return numbers.tobytes(), tuple(inline)
+
+
+def _encode_rng(rng: "random.Random") -> Tuple[int, bytes, Any]:
+    """(version, internal state as little-endian words, gauss_next)"""
+    version, internal, gauss_next = rng.getstate()
+    words = array("I", internal)
+    if sys.byteorder == "big":
+        words.byteswap()
+    return version, words.tobytes(), gauss_next
+
+
+def _decode_rng(seed: Optional[int], encoded: Tuple) -> "random.Random":
+    version, packed, gauss_next = encoded
+    words = array("I")
+    words.frombytes(packed)
+    if sys.byteorder == "big":
+        words.byteswap()
+    rng = new_rng(seed)
+    rng.setstate((version, tuple(words), gauss_next))
+    return rng
+
+
+def save_game(game) -> bytes:
+    """Take a single snapshot of a game; see SnapshotWriter for repeats."""
+    return SnapshotWriter(game).save()
+
+
+def restore_game(game, data: bytes) -> None:
+    """
+    Put a game back into the state recorded in a snapshot.
+
+    Args:
+        game: The Game to restore, usually a new one
+        data: A snapshot from save_game or SnapshotWriter.save
+
+    Raises:
+        ValueError: If the data is not a snapshot, or its level no longer
+            matches the one it was taken from
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("not a game snapshot")
+    magic, version, level_number, item_count = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("not a game snapshot")
+    try:
+        (seed, game_over, player_state, encoded_rooms, removed,
+         rng_state) = marshal.loads(memoryview(data)[_HEADER.size:])
+        rng = None if rng_state is None else _decode_rng(seed, rng_state)
+    except (EOFError, ValueError, TypeError):
+        raise ValueError("damaged game snapshot") from None
+
+    template = compile_level(level_number)
+    if template is None or len(template.items) != item_count:
+        raise ValueError(f"level {level_number} has changed since the save")
+
+    game.seed = seed
+    game._rng = rng
+    game.current_level = level_number
+    load_level(game, level_number)
+    items = template.items
+    rooms = game.rooms
+    for room_id in removed:
+        del rooms[room_id]
+    for (room_id, numbers, inline, positions,
+         exits, details) in encoded_rooms:
+        if details is None:
+            room = rooms[room_id]
+        else:
+            room = rooms[room_id] = Room(*details)
+        room.items = ItemStore(_decode_items(items, numbers, inline))
+        if positions is not None:
+            room._item_positions = positions or None
+        if exits is not None:
+            room.connections = exits
+        room._version += 1
+
+    name, health, current_room_id, numbers, inline = player_state
+    player = game.player = Player(name, health)
+    player.inventory = ItemStore(_decode_items(items, numbers, inline))
+    player.current_room_id = current_room_id
+    game.game_over = game_over
+
+
+def _decode_items(
+    items: List[Item], numbers: bytes, inline: Tuple[Any, ...]
+) -> List[Item]:
+    typecode = _typecode(len(items))
+    marker = _inline_marker(typecode)
+    decoded = array(typecode)
+    decoded.frombytes(numbers)
+    if sys.byteorder == "big":
+        decoded.byteswap()
+    inline = iter(inline)
+    return [
+        Item.define(*next(inline)) if number == marker else items[number]
+        for number in decoded
+    ]
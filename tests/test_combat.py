@@ -0,0 +1,88 @@
+"""Exact battle odds from combat.py, checked against a brute force."""
+from fractions import Fraction
+from functools import lru_cache
+from itertools import product
+
+import pytest
+
+from combat import (
+    BattleOdds, battle_odds, boss_damage_range, effective_boss_power,
+    player_damage_range
+)
+
+
+def brute_force_odds(
+    player_power: int, player_health: int, boss_health: int, boss_power: int
+):
+    """(win probability, expected rounds) by recursing over every roll."""
+    player_low, player_high = player_damage_range(player_power)
+    boss_low, boss_high = boss_damage_range(boss_power)
+    player_rolls = range(player_low, player_high + 1)
+    boss_rolls = range(boss_low, boss_high + 1)
+
+    @lru_cache(maxsize=None)
+    def odds(player_left: int, boss_left: int):
+        if boss_left <= 0:
+            return Fraction(1), Fraction(0)
+        if player_left <= 0:
+            return Fraction(0), Fraction(0)
+        win = rounds = Fraction(0)
+        for player_damage in player_rolls:
+            if boss_left - player_damage <= 0:
+                outcomes = [(Fraction(1), Fraction(0))]
+            else:
+                outcomes = [
+                    odds(player_left - boss_damage,
+                         boss_left - player_damage)
+                    for boss_damage in boss_rolls
+                ]
+            for next_win, next_rounds in outcomes:
+                share = Fraction(1, len(player_rolls) * len(outcomes))
+                win += share * next_win
+                rounds += share * (1 + next_rounds)
+        return win, rounds
+
+    return odds(player_health, boss_health)
+
+
+def assert_matches(odds: BattleOdds, expected) -> None:
+    win, rounds = expected
+    assert odds.win_probability == pytest.approx(float(win), abs=1e-12)
+    assert odds.expected_rounds == pytest.approx(float(rounds), abs=1e-12)
+
+
+@pytest.mark.parametrize(
+    "player_power,player_health,boss_health,boss_power",
+    list(product((1, 2, 5, 9, 14), (1, 4, 13), (1, 6, 17), (10, 16, 30)))
+)
+def test_odds_match_brute_force(
+    player_power, player_health, boss_health, boss_power
+):
+    odds = battle_odds(
+        player_power, player_health,
+        {"health": boss_health, "power": boss_power}
+    )
+    assert_matches(odds, brute_force_odds(
+        player_power, player_health, boss_health,
+        effective_boss_power(boss_power, player_power)
+    ))
+
+
+@pytest.mark.parametrize("boss_health", (0, -5))
+def test_a_slain_boss_is_already_won(boss_health):
+    odds = battle_odds(7, 20, {"health": boss_health, "power": 25})
+    assert odds == BattleOdds(1.0, 0.0)
+
+
+def test_a_powerless_player_cannot_win():
+    odds = battle_odds(0, 25, {"health": 8, "power": 12})
+    assert odds.win_probability == 0.0
+    assert_matches(odds, brute_force_odds(0, 25, 8, 12))
+
+
+def test_boss_power_is_weakened_no_further_than_10():
+    boss = {"health": 15, "power": 25}
+    assert effective_boss_power(boss["power"], 30) == 10
+    odds = battle_odds(30, 12, boss)
+    assert odds == battle_odds(30, 12, {"health": 15, "power": 12})
+    assert_matches(odds, brute_force_odds(30, 12, 15, 10))
@@ -0,0 +1,99 @@
+"""Checking that levels can be completed with level_graph.analyze_level."""
+from typing import Dict, List, Optional, Tuple
+
+import level_manager
+from game_classes import Item, Room
+from level_graph import analyze_level
+
+Exit = Tuple[str, str, str]  # (room_id, direction, target_id)
+
+
+def build_rooms(
+    exits: List[Exit], items: Optional[Dict[str, int]] = None
+) -> Dict[str, Room]:
+    """Rooms joined by the given exits, with some items in each."""
+    rooms: Dict[str, Room] = {}
+    for room_id, _, target_id in exits:
+        for new_id in (room_id, target_id):
+            if new_id not in rooms and new_id != "nowhere":
+                rooms[new_id] = Room(new_id.title(), f"The {new_id}.")
+    for room_id, direction, target_id in exits:
+        rooms[room_id].add_connection(direction, target_id)
+    for room_id, count in (items or {}).items():
+        for number in range(count):
+            rooms[room_id].add_item(Item(f"gem {number}", "A gem.", 1))
+    return rooms
+
+
+def two_way(room_id: str, direction: str, target_id: str) -> List[Exit]:
+    back = {"north": "south", "south": "north", "east": "west",
+            "west": "east"}[direction]
+    return [(room_id, direction, target_id), (target_id, back, room_id)]
+
+
+def test_shipped_levels_can_be_completed():
+    for level in level_manager.available_levels():
+        template = level_manager.compile_level(level, report=False)
+        assert template.analysis.solvable, template.analysis.problems
+
+
+def test_items_behind_a_one_way_exit_are_not_counted():
+    # The pit can be dropped into but not climbed out of
+    rooms = build_rooms(
+        two_way("start", "north", "boss") + [("start", "east", "pit")],
+        {"pit": 2, "start": 1}
+    )
+    analysis = analyze_level(rooms, {"required_items": 2})
+    assert analysis.reachable_rooms == 2
+    assert analysis.boss_reachable
+    assert analysis.collectable_items == 1
+    assert analysis.problems == [
+        "only 1 of the 2 required items can be collected before reaching "
+        "the boss"
+    ]
+
+
+def test_a_one_way_exit_towards_the_boss_is_followed():
+    rooms = build_rooms(
+        two_way("start", "east", "hall") + [("hall", "north", "cellar"),
+                                            ("cellar", "north", "boss")],
+        {"hall": 1, "cellar": 2}
+    )
+    analysis = analyze_level(rooms, {"required_items": 3})
+    assert analysis.solvable
+    assert analysis.collectable_items == 3
+
+
+def test_an_unreachable_boss():
+    rooms = build_rooms(
+        two_way("start", "east", "hall") + [("boss", "west", "hall")],
+        {"hall": 1}
+    )
+    analysis = analyze_level(rooms, {"required_items": 1})
+    assert not analysis.boss_reachable
+    assert analysis.problems == [
+        "the boss room cannot be reached from the start"
+    ]
+
+
+def test_items_only_reachable_through_the_boss_room():
+    rooms = build_rooms(
+        two_way("start", "north", "boss") + two_way("boss", "north", "vault"),
+        {"vault": 3}
+    )
+    analysis = analyze_level(rooms, {"required_items": 1})
+    assert analysis.reachable_rooms == 1  # Just the start
+    assert analysis.collectable_items == 0
+    assert not analysis.solvable
+
+
+def test_a_dangling_exit():
+    rooms = build_rooms(
+        two_way("start", "north", "boss") + [("start", "east", "nowhere")]
+    )
+    analysis = analyze_level(rooms, {"required_items": 0})
+    assert analysis.graph.dangling == [("start", "east", "nowhere")]
+    assert analysis.boss_reachable
+    assert analysis.problems == [
+        "exit east from start leads to unknown room nowhere"
+    ]
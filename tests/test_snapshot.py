@@ -0,0 +1,106 @@
+"""Saving and restoring games with snapshot.py."""
+import level_manager
+from main import Game
+from output import MemorySink
+from pacing import InstantPacer
+from snapshot import SnapshotWriter, restore_game, save_game
+
+# Takes items around level 1 and drops one in another room
+SCRIPT = [
+    "go north", "go west", "take sword", "take shield", "go east",
+    "drop shield", "go east", "take spellbook", "go north", "take potion",
+    "go south", "go west",
+]
+
+# Played by both the original and the restored game
+MORE = [
+    "take shield", "look", "go west", "drop sword", "inventory", "go east",
+    "go down", "take dagger", "go up",
+]
+
+
+def new_game() -> Game:
+    game = Game(seed=7, pacer=InstantPacer(), output=MemorySink())
+    game.prefetch_next_level = False
+    game.begin("Ann")
+    return game
+
+
+def play(game: Game, commands) -> str:
+    """What the game says while playing the commands, room by room."""
+    output = game.output
+    output.flush()
+    start = len(output.flushes)
+    for command in commands:
+        game.peek_room(game.player.current_room_id).display(output)
+        game.process_command(command)
+        output.flush()
+    return "".join(output.flushes[start:])
+
+
+def template_state(level: int):
+    """Everything a game could change in a level's shared rooms."""
+    rooms = level_manager.compile_level(level).rooms
+    return {
+        room_id: (
+            [id(item) for item in room.items], dict(room.connections),
+            dict(room._item_positions or {}), room._version
+        )
+        for room_id, room in rooms.items()
+    }
+
+
+def room_state(game: Game):
+    return {
+        room_id: [item.name for item in game.peek_room(room_id).items]
+        for room_id in game.rooms
+    }
+
+
+def test_restored_game_plays_on_like_the_original():
+    original = new_game()
+    template_before = template_state(1)
+    play(original, SCRIPT)
+    original.rng.random()  # The stream is part of the saved state
+    data = save_game(original)
+
+    restored = Game(pacer=InstantPacer(), output=MemorySink())
+    restore_game(restored, data)
+
+    assert restored.current_level == original.current_level
+    assert restored.player.current_room_id == original.player.current_room_id
+    assert [item.name for item in restored.player.inventory] == [
+        item.name for item in original.player.inventory
+    ]
+    assert room_state(restored) == room_state(original)
+    assert restored.rng.random() == original.rng.random()
+
+    assert play(restored, MORE) == play(original, MORE)
+    assert room_state(restored) == room_state(original)
+    assert template_state(1) == template_before
+
+
+def test_incremental_saves_match_full_saves():
+    game = new_game()
+    writer = SnapshotWriter(game)
+    for command in SCRIPT:
+        game.process_command(command)
+        assert writer.save() == save_game(game)
+
+
+def test_restoring_does_not_change_the_level():
+    game = new_game()
+    template_before = template_state(1)
+    play(game, SCRIPT)
+    data = save_game(game)
+    for _ in range(2):
+        restored = Game(pacer=InstantPacer(), output=MemorySink())
+        restore_game(restored, data)
+        play(restored, MORE)
+    assert template_state(1) == template_before
+
+    fresh = new_game()
+    assert room_state(fresh) == {
+        room_id: [item.name for item in room.items]
+        for room_id, room in level_manager.compile_level(1).rooms.items()
+    }
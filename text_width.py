@@ -0,0 +1,98 @@
+"""How many terminal columns text takes up.
+
+`len` counts code points, not columns: wide emojis like 🐉 take two
+columns, an emoji variation selector (U+FE0F) widens the symbol before
+it to two columns while taking none itself, and combining marks and
+zero width joiners take none. Widths follow Unicode's East Asian Width
+property, with ambiguous characters such as box drawing treated as
+narrow, as Western terminals draw them.
+
+The emojis the game shows come from a small vocabulary, so their widths
+are worked out once, up front (see precompute_widths), and looking one
+up costs a dictionary access instead of a scan.
+"""
+import unicodedata
+from typing import Dict, Iterable
+
+# Columns taken by East Asian Ambiguous characters, e.g. ║ and ⛓;
+# CJK terminals draw them two columns wide
+AMBIGUOUS_WIDTH = 1
+
+_TEXT_PRESENTATION = "\ufe0e"  # VS15: draw the symbol before as text
+_EMOJI_PRESENTATION = "\ufe0f"  # VS16: draw the symbol before as emoji
+_ZERO_WIDTH_JOINER = "\u200d"
+_ZERO_WIDTH_CATEGORIES = frozenset(("Mn", "Me", "Cf", "Cc"))
+_SKIN_TONES = range(0x1F3FB, 0x1F400)  # Emoji modifiers
+
+# text -> width, for the vocabulary of known emoji strings
+_widths: Dict[str, int] = {}
+
+
+def char_width(char: str) -> int:
+    """Columns taken by one character on its own."""
+    if unicodedata.category(char) in _ZERO_WIDTH_CATEGORIES:
+        return 0
+    east_asian_width = unicodedata.east_asian_width(char)
+    if east_asian_width in ("W", "F"):
+        return 2
+    if east_asian_width == "A":
+        return AMBIGUOUS_WIDTH
+    return 1
+
+
+def measure(text: str) -> int:
+    """Columns taken by text, scanning it character by character."""
+    width = 0
+    previous = 0  # Width of the last visible character
+    joined = False
+    for char in text:
+        if char == _EMOJI_PRESENTATION:
+            if previous == 1:
+                width += 1
+                previous = 2
+        elif char == _TEXT_PRESENTATION:
+            if previous == 2:
+                width -= 1
+                previous = 1
+        elif char == _ZERO_WIDTH_JOINER:
+            joined = previous > 0
+        elif joined or (previous == 2 and ord(char) in _SKIN_TONES):
+            # Drawn as part of the emoji before it
+            joined = False
+        else:
+            previous = char_width(char)
+            width += previous
+    return width
+
+
+def display_width(text: str) -> int:
+    """
+    Columns taken by text, such as a line of emojis.
+
+    Known strings and the space-separated words of a line are looked up
+    in the precomputed table; anything else is measured.
+    """
+    width = _widths.get(text)
+    if width is not None:
+        return width
+    width = text.count(" ")
+    for word in text.split(" "):
+        word_width = _widths.get(word)
+        width += measure(word) if word_width is None else word_width
+    return width
+
+
+def art_width(art: str) -> int:
+    """Columns taken by the widest line of multi-line art."""
+    return max(
+        (measure(line) for line in art.split("\n") if line.strip()),
+        default=0
+    )
+
+
+def precompute_widths(vocabulary: Iterable[str]) -> None:
+    """Add strings, and each of their words, to the width table."""
+    for text in vocabulary:
+        for word in text.split(" "):
+            _widths[word] = measure(word)
+        _widths[text] = measure(text)